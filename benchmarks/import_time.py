@@ -0,0 +1,63 @@
+"""
+Measure the startup cost of the extraction entry points.
+
+Every module is imported in a fresh interpreter, so nothing is shared between
+measurements. The heavy PDF libraries should only show up once a PDF is
+actually processed; a run over .docx files never needs them.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py [--repeat N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["cv2", "numpy", "fitz", "pymupdf", "pypdf", "PIL", "pytesseract", "pdf2image"]
+
+TARGETS = [
+    # What a .docx-only run loads before the first file is extracted
+    ("docx extractor", "import helpers.extract_word_new"),
+    ("batch dispatcher", "import helpers.batch"),
+    # What the first PDF pulls in on top of that
+    ("PDF libraries", "import helpers.batch, cv2, numpy, fitz, pypdf"),
+]
+
+SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ",".join(heavy) or "-")
+"""
+
+
+def measure(statement, repeat):
+    timings = []
+    heavy = ""
+    for _ in range(repeat):
+        code = SNIPPET.format(root=str(REPO_ROOT), statement=statement, heavy=HEAVY_MODULES)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        elapsed, heavy = out.stdout.strip().splitlines()[-1].split(" ", 1)
+        timings.append(float(elapsed))
+    return statistics.median(timings), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the extraction entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target (median is reported)")
+    args = parser.parse_args()
+
+    print(f"{'target':<20} {'median ms':>10}  heavy modules loaded")
+    for name, statement in TARGETS:
+        elapsed, heavy = measure(statement, args.repeat)
+        print(f"{name:<20} {elapsed * 1000:>10.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
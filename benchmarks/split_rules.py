@@ -0,0 +1,82 @@
+"""
+Compare get_text_info's split-rule resolution (helpers.pdf.split_text, the
+function it calls on the document text) with the per-rule remainder loop it
+replaced.
+
+The text is synthetic: the form's patterns with filler in between, repeated to
+reach each size, so long OCR-like texts with many pattern hits are covered.
+Both implementations must return the same values.
+
+Usage (from the repository root):
+    python benchmarks/split_rules.py [--repeat N]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers.extract_pdf_new import SPLIT_RULES, KNEE_SPLIT_RULES
+from helpers.pdf import split_text
+
+RULES = SPLIT_RULES + KNEE_SPLIT_RULES
+SIZES = [2_600, 33_000, 336_000]
+
+
+def remainder_loop(full_text, split_rules):
+    """The previous implementation: find() per pattern and a remainder copy per rule."""
+    out = {}
+    for rule in split_rules:
+        start_pat = rule["start"]
+        end_pat = rule["end"]
+        abs_start = full_text.find(start_pat)
+        if "second_start" in rule:
+            abs_start = full_text.find(start_pat, abs_start + len(start_pat))
+        if abs_start == -1:
+            out[rule["key"]] = ""
+            continue
+        cursor = abs_start + len(start_pat)
+        remainder = full_text[cursor:]
+        if end_pat == "\n":
+            nl_idx = remainder.find("\n")
+            value = remainder if nl_idx == -1 else remainder[:nl_idx]
+        else:
+            end_idx = remainder.find(end_pat)
+            value = "" if end_idx == -1 else remainder[:end_idx]
+        out[rule["key"]] = value.strip()
+    return out
+
+
+def make_text(size, seed=0):
+    rng = random.Random(seed)
+    patterns = [p for rule in RULES for p in (rule["start"], rule["end"])]
+    words = ["player", "match", "training", "left", "right", "knee", "ankle", "12.03.2024", "yes", "no"]
+    parts = []
+    length = 0
+    while length < size:
+        part = rng.choice(patterns) if rng.random() < 0.3 else " ".join(rng.choices(words, k=rng.randint(1, 8)))
+        parts.append(part)
+        length += len(part) + 1
+    return " ".join(parts)[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark split-rule resolution.")
+    parser.add_argument("--repeat", type=int, default=200, help="runs per measurement at the smallest size")
+    args = parser.parse_args()
+
+    print(f"{len(RULES)} rules")
+    print(f"{'chars':>8} {'remainder loop ms':>18} {'split_text ms':>14}")
+    for size in SIZES:
+        text = make_text(size)
+        assert split_text(text, RULES) == remainder_loop(text, RULES)
+        number = max(1, args.repeat * SIZES[0] // size)
+        old = min(timeit.repeat(lambda: remainder_loop(text, RULES), number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: split_text(text, RULES), number=number, repeat=5)) / number
+        print(f"{size:>8} {old * 1000:>18.3f} {new * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -623,4 +623,14 @@ checkbox_map_by_type = {
 }
 
 
-        
\ No newline at end of file
+        
+
+def _labels_by_number(labels):
+    # Index i holds the label of box i; box numbers start at 1, so index 0 is unused
+    return (None,) + tuple(labels[str(i)] for i in range(1, len(labels) + 1))
+
+
+# The same labels as tuples indexed by box number
+checkbox_labels = _labels_by_number(checkbox_map)
+
+checkbox_labels_by_type = {form_type: _labels_by_number(labels) for form_type, labels in checkbox_map_by_type.items()}
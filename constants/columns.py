@@ -54,3 +54,12 @@ column_names = [
 ]
 
 row = {name: "" for name in column_names}
+
+# Low-cardinality columns, dictionary-encoded in the Parquet/Arrow outputs
+categorical_columns = [
+    "FORM_TYPE",
+    "SEX",
+    "TEAM",
+    "INJURY_SIDE",
+    "ONSET",
+]
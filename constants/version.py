@@ -0,0 +1,5 @@
+# Bump whenever a change to the extractors alters the rows they produce, so
+# cached and stored results from older versions are re-extracted. Learned
+# layout templates need no bump: helpers.cache.extraction_version adds a
+# fingerprint of constants/layouts to the key.
+EXTRACTOR_VERSION = "3"
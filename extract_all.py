@@ -1,9 +1,10 @@
+import argparse
 from pathlib import Path
-from datetime import datetime
 from tqdm import tqdm
-import pandas as pd
-from helpers.extract_word_new import extract_info_from_word
-from helpers.extract_pdf_new import extract_info_from_pdf
+from helpers.batch import iter_extractions
+from helpers.cache import ExtractionCache
+from helpers.store import ExtractionStore
+from helpers.output import ROW_WRITERS, output_columns, open_row_writers
 
 def _numeric_or_text_key(stem: str):
     try:
@@ -38,72 +39,63 @@ def _build_ordered_sequence_by_stem(folder: Path):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract injury data from all Word and PDF forms under men/ and women/")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1, no pool)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract every file instead of reusing cached rows")
+    parser.add_argument("--format", nargs="+", choices=sorted(ROW_WRITERS), default=["xlsx"], help="Output file format(s), e.g. --format xlsx parquet (default: xlsx)")
+    args = parser.parse_args()
+
     print("Document Extractor (Word + PDF) - All Formats")
     print("=" * 50)
 
     base_dir = Path(__file__).parent
     men_dir = base_dir / "men"
     women_dir = base_dir / "women"
+    # The store already skips unchanged files. The cache, keyed by content
+    # rather than by name, covers what the store sees as new: renamed or moved
+    # files, files already extracted by the other driver, and a deleted store.
+    cache = None if args.no_cache else ExtractionCache(base_dir / ".extraction_cache")
 
-    rows = []
-
-    # Process men first, interleaving docx/pdf by base FILENAME
-    if men_dir.exists():
-        men_files = _build_ordered_sequence_by_stem(men_dir)
-        for f in tqdm(men_files, desc="Processing men", unit="file"):
-            if f.suffix.lower() == ".pdf":
-                injury_data = extract_info_from_pdf(str(f))
-            else:
-                injury_data = extract_info_from_word(str(f))
-            if injury_data is None:
-                continue
-            # store path relative to men/ to drop the 'men/' prefix
-            file_name = str(f.relative_to(men_dir)) if f.is_relative_to(men_dir) else str(f)
-            injury_data["FILENAME"] = file_name
-            injury_data["SEX"] = "Male"
-            
-            # Extract TEAM from filename for new format files
-            if injury_data.get("FORM_TYPE") != "OLD":
-                injury_data["TEAM"] = file_name.split(",")[0] if len(file_name.split(",")) > 1 else "UNKNOWN"
-            
-            # Add UPDATED_AT timestamp
-            injury_data["UPDATED_AT"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            rows.append(injury_data)
-
-    # Then process women, interleaving docx/pdf by base FILENAME
-    if women_dir.exists():
-        women_files = _build_ordered_sequence_by_stem(women_dir)
-        for f in tqdm(women_files, desc="Processing women", unit="file"):
-            if f.suffix.lower() == ".pdf":
-                injury_data = extract_info_from_pdf(str(f))
-            else:
-                injury_data = extract_info_from_word(str(f))
-            if injury_data is None:
+    output_paths = [base_dir / f"injury_data.{output_format}" for output_format in dict.fromkeys(args.format)]
+    # Ensure FILENAME, SEX, and FORM_TYPE are at the beginning
+    columns = output_columns(priority=["FILENAME", "SEX", "FORM_TYPE"])
+
+    # Process men first, then women, interleaving docx/pdf by base FILENAME
+    sources = [("men", men_dir, "Male"), ("women", women_dir, "Female")]
+
+    # Rows are kept in the store; only new or changed files are extracted again
+    with ExtractionStore(base_dir / "injury_data.sqlite") as store:
+        store.begin_run([source for source, _, _ in sources])
+        for source, folder, sex in sources:
+            if not folder.exists():
                 continue
-            # store path relative to women/ to drop the 'women/' prefix
-            file_name = str(f.relative_to(women_dir)) if f.is_relative_to(women_dir) else str(f)
-            injury_data["FILENAME"] = file_name
-            injury_data["SEX"] = "Female"
-            
-            # Extract TEAM from filename for new format files
-            if injury_data.get("FORM_TYPE") != "OLD":
-                injury_data["TEAM"] = file_name.split(",")[0] if len(file_name.split(",")) > 1 else "UNKNOWN"
-            
-            # Add UPDATED_AT timestamp
-            injury_data["UPDATED_AT"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            rows.append(injury_data)
-
-    if not rows:
+            files = _build_ordered_sequence_by_stem(folder)
+            # store path relative to the folder to drop the 'men/' or 'women/' prefix
+            file_names = {f: str(f.relative_to(folder)) if f.is_relative_to(folder) else str(f) for f in files}
+            pending = store.plan(source, files, [file_names[f] for f in files], force=args.no_cache)
+            pending_files = [f for f, _ in pending]
+            hashes = [content_hash for _, content_hash in pending]
+            extractions = iter_extractions(pending_files, workers=args.workers, cache=cache, hashes=hashes)
+            for (f, injury_data), content_hash in zip(tqdm(extractions, total=len(pending_files), desc=f"Processing {source}", unit="file"), hashes):
+                if injury_data is None:
+                    continue
+                file_name = file_names[f]
+                injury_data["FILENAME"] = file_name
+                injury_data["SEX"] = sex
+
+                # Extract TEAM from filename for new format files
+                if injury_data.get("FORM_TYPE") != "OLD":
+                    injury_data["TEAM"] = file_name.split(",")[0] if len(file_name.split(",")) > 1 else "UNKNOWN"
+
+                # Sets the UPDATED_AT timestamp
+                store.upsert(source, content_hash, injury_data)
+        store.end_run()
+
+        # The output files are exports of the store
+        with open_row_writers(output_paths, columns) as writer:
+            store.export(writer)
+
+    if writer.rows_written == 0:
         print("No .docx or .pdf files found under 'men' or 'women'.")
     else:
-        df = pd.DataFrame(rows)
-        # Ensure FILENAME, SEX, and FORM_TYPE are at the beginning
-        priority_cols = ["FILENAME", "SEX", "FORM_TYPE"]
-        ordered_cols = priority_cols + [c for c in df.columns if c not in priority_cols]
-        df = df[ordered_cols]
-        output_excel = base_dir / "injury_data.xlsx"
-        df.to_excel(output_excel, index=False)
-        print(f"Saved Excel to {output_excel}")
-
+        print(f"Saved {writer.rows_written} rows to {', '.join(str(p) for p in output_paths)}")
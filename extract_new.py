@@ -1,9 +1,10 @@
+import argparse
 from pathlib import Path
-from datetime import datetime
 from tqdm import tqdm
-import pandas as pd
-from helpers.extract_word_new import extract_info_from_word
-from helpers.extract_pdf_new import extract_info_from_pdf
+from helpers.batch import iter_extractions
+from helpers.cache import ExtractionCache
+from helpers.store import ExtractionStore
+from helpers.output import ROW_WRITERS, output_columns, open_row_writers
 
 def _numeric_or_text_key(stem: str):
     try:
@@ -38,42 +39,54 @@ def _build_ordered_sequence_by_stem(folder: Path):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract injury data from the Word and PDF forms under updated/")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract every file instead of reusing cached rows")
+    parser.add_argument("--format", nargs="+", choices=sorted(ROW_WRITERS), default=["xlsx"], help="Output file format(s), e.g. --format xlsx parquet (default: xlsx)")
+    args = parser.parse_args()
+
     print("Document Extractor (Word + PDF)")
     print("=" * 50)
 
     base_dir = Path(__file__).parent
     directory = base_dir / "updated"
+    # The store already skips unchanged files. The cache, keyed by content
+    # rather than by name, covers what the store sees as new: renamed or moved
+    # files, files already extracted by the other driver, and a deleted store.
+    cache = None if args.no_cache else ExtractionCache(base_dir / ".extraction_cache")
 
-    rows = []
+    output_paths = [base_dir / f"injury_data_updated.{output_format}" for output_format in dict.fromkeys(args.format)]
+    # Ensure FILENAME is the first column
+    columns = output_columns(priority=["FILENAME"])
 
-    # Process men first, interleaving docx/pdf by base FILENAME
-    if directory.exists():
-        files = _build_ordered_sequence_by_stem(directory)
-        for f in tqdm(files, desc="Processing files", unit="file"):
-            if f.suffix.lower() == ".pdf":
-                injury_data = extract_info_from_pdf(str(f))
-            else:
-                injury_data = extract_info_from_word(str(f))
-            if injury_data is None:
-                continue
+    # Rows are kept in the store; only new or changed files are extracted again
+    with ExtractionStore(base_dir / "injury_data_updated.sqlite") as store:
+        store.begin_run(["updated"])
+        # Interleave docx/pdf by base FILENAME
+        if directory.exists():
+            files = _build_ordered_sequence_by_stem(directory)
             # store path relative to directory to drop the 'directory/' prefix
-            file_name = str(f.relative_to(directory)) if f.is_relative_to(directory) else str(f)
-            injury_data["FILENAME"] = file_name
+            file_names = {f: str(f.relative_to(directory)) if f.is_relative_to(directory) else str(f) for f in files}
+            pending = store.plan("updated", files, [file_names[f] for f in files], force=args.no_cache)
+            pending_files = [f for f, _ in pending]
+            hashes = [content_hash for _, content_hash in pending]
+            extractions = iter_extractions(pending_files, cache=cache, hashes=hashes)
+            for (f, injury_data), content_hash in zip(tqdm(extractions, total=len(pending_files), desc="Processing files", unit="file"), hashes):
+                if injury_data is None:
+                    continue
+                file_name = file_names[f]
+                injury_data["FILENAME"] = file_name
 
-            injury_data["TEAM"] = file_name.split(",")[0] if len(file_name.split(",")) > 1 else "UNKNOWN"
+                injury_data["TEAM"] = file_name.split(",")[0] if len(file_name.split(",")) > 1 else "UNKNOWN"
 
+                # Sets the UPDATED_AT timestamp
+                store.upsert("updated", content_hash, injury_data)
+        store.end_run()
 
-            injury_data["UPDATED_AT"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            rows.append(injury_data)
+        # The output files are exports of the store
+        with open_row_writers(output_paths, columns) as writer:
+            store.export(writer)
 
-    if not rows:
+    if writer.rows_written == 0:
         print("No .docx or .pdf files found under 'updated'.")
     else:
-        df = pd.DataFrame(rows)
-        # Ensure FILENAME is the first column
-        ordered_cols = ["FILENAME"] + [c for c in df.columns if c != "FILENAME"]
-        df = df[ordered_cols]
-        #Print the column names 
-        output_excel = base_dir / "injury_data_updated.xlsx"
-        df.to_excel(output_excel, index=False)
-        print(f"Saved Excel to {output_excel}")
\ No newline at end of file
+        print(f"Saved {writer.rows_written} rows to {', '.join(str(p) for p in output_paths)}")
@@ -0,0 +1,91 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import traceback
+from helpers.extract_word_new import extract_info_from_word
+from helpers.extract_pdf_new import extract_info_from_pdf
+from helpers.cache import file_hash
+
+
+def extract_file(path):
+    """Run the matching extractor for one .docx/.pdf file.
+
+    Returns the extracted row dict, or None if the extractor failed, so a single
+    bad file never aborts a batch run.
+    """
+    try:
+        if Path(path).suffix.lower() == ".pdf":
+            return extract_info_from_pdf(str(path))
+        return extract_info_from_word(str(path))
+    except Exception:
+        print(f"\nFailed to extract {path}:\n{traceback.format_exc()}")
+        return None
+
+
+def iter_extractions(files, workers=1, cache=None, hashes=None):
+    """Yield (path, injury_data) for every file, in the order of `files`.
+
+    With workers > 1 the files are spread over a process pool. Results are still
+    yielded in input order. If a worker process dies (e.g. a segfault inside a
+    native library) the file it was working on is reported as failed and the
+    pool is restarted for the files that were still pending.
+
+    If an ExtractionCache is given, files whose content is already cached are
+    not extracted again; new results are added to the cache. `hashes` can pass
+    in content hashes the caller already computed, in the order of `files`.
+    """
+    files = list(files)
+    if cache is not None and hashes is None:
+        hashes = [file_hash(f) for f in files]
+    cached = {}
+    if cache is not None:
+        for i, content_hash in enumerate(hashes):
+            injury_data = cache.get(content_hash)
+            if injury_data is not None:
+                cached[i] = injury_data
+
+    pending = [f for i, f in enumerate(files) if i not in cached]
+    extracted = _iter_extract(pending, workers)
+    for i, f in enumerate(files):
+        if i in cached:
+            yield f, cached[i]
+            continue
+        _, injury_data = next(extracted)
+        if injury_data is not None and cache is not None:
+            cache.put(hashes[i], injury_data)
+        yield f, injury_data
+
+
+def _iter_extract(files, workers):
+    if workers is None or workers <= 1:
+        for f in files:
+            yield f, extract_file(f)
+        return
+
+    next_idx = 0
+    while next_idx < len(files):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_file, f) for f in files[next_idx:]]
+            for future in futures:
+                f = files[next_idx]
+                try:
+                    injury_data = future.result()
+                except BrokenProcessPool:
+                    # The crash may have come from any file in flight, so retry
+                    # the current one on its own before blaming it
+                    injury_data = _extract_isolated(f)
+                    next_idx += 1
+                    yield f, injury_data
+                    break
+                next_idx += 1
+                yield f, injury_data
+
+
+def _extract_isolated(path):
+    """Extract one file in a fresh single-worker pool, returning None if it crashes."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(extract_file, path).result()
+        except BrokenProcessPool:
+            print(f"\nWorker crashed while extracting {path}, skipping file")
+            return None
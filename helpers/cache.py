@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from constants.version import EXTRACTOR_VERSION
+from helpers.layout import layouts_fingerprint
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_version():
+    """Return the version that cached and stored rows are keyed by.
+
+    This is EXTRACTOR_VERSION plus a fingerprint of the learned layout templates,
+    since learning or replacing a template can change the extracted tick boxes.
+    """
+    fingerprint = layouts_fingerprint()
+    return EXTRACTOR_VERSION if fingerprint is None else f"{EXTRACTOR_VERSION}-{fingerprint}"
+
+
+class ExtractionCache:
+    """Persistent cache of extracted row dicts.
+
+    Entries are keyed by file content hash plus extraction_version(), so renamed
+    files still hit and any extractor or layout template change invalidates
+    everything at once.
+    Each entry is a small JSON file written atomically, which keeps concurrent
+    runs and crashes from leaving half-written entries behind.
+    """
+
+    def __init__(self, cache_dir, version=None):
+        if version is None:
+            version = extraction_version()
+        self.cache_dir = Path(cache_dir) / f"v{version}"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, content_hash):
+        return self.cache_dir / content_hash[:2] / f"{content_hash}.json"
+
+    def get(self, content_hash):
+        """Return the cached row dict for this content hash, or None on a miss."""
+        try:
+            with open(self._entry_path(content_hash), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, content_hash, injury_data):
+        entry_path = self._entry_path(content_hash)
+        entry_path.parent.mkdir(exist_ok=True)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(injury_data, f, ensure_ascii=False)
+        os.replace(tmp_path, entry_path)
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Box states as stored in CheckboxState.states
+MISSING, UNCHECKED, CHECKED = -1, 0, 1
+
+
+class CheckboxState:
+    """
+    Checked state of the numbered tick boxes of one form.
+
+    States are kept in a small int8 array indexed by box number (box numbers
+    start at 1, index 0 is unused), so a range of boxes is a slice instead of
+    one dict lookup per box. Looking up a box that was not detected raises
+    KeyError, as the {number: checked} dicts this replaces did.
+    """
+
+    def __init__(self, states):
+        self.states = np.asarray(states, dtype=np.int8)
+
+    @classmethod
+    def from_boxes(cls, boxes):
+        """Build the state from detected boxes (dicts with "number" and "checked")."""
+        boxes = list(boxes)
+        size = max((box["number"] for box in boxes), default=0) + 1
+        states = np.full(size, MISSING, dtype=np.int8)
+        for box in boxes:
+            states[box["number"]] = CHECKED if box["checked"] else UNCHECKED
+        return cls(states)
+
+    def __len__(self):
+        # Number of detected boxes
+        return int(np.count_nonzero(self.states != MISSING))
+
+    def __getitem__(self, number):
+        if not 0 <= number < len(self.states) or self.states[number] == MISSING:
+            raise KeyError(number)
+        return bool(self.states[number])
+
+    def checked_between(self, start, end):
+        """Return the numbers of the checked boxes in range(start, end)."""
+        if start >= end:
+            return np.empty(0, dtype=np.intp)
+        if start < 0 or end > len(self.states):
+            missing = start if start < 0 else len(self.states)
+            raise KeyError(missing)
+        window = self.states[start:end]
+        if (window == MISSING).any():
+            raise KeyError(start + int(np.flatnonzero(window == MISSING)[0]))
+        return np.flatnonzero(window) + start
+
+    def labels_between(self, labels, start, end):
+        """Return the labels of the checked boxes in range(start, end); `labels` is indexed by box number."""
+        return [labels[i] for i in self.checked_between(start, end)]
+
+    def to_dict(self):
+        """Return the {"number": checked} form."""
+        return {str(i): bool(state) for i, state in enumerate(self.states) if state != MISSING}
@@ -0,0 +1,62 @@
+import os
+import queue
+import threading
+import traceback
+from multiprocessing import util
+
+# Set to 1/true/yes/on to write checkbox debug images into debug/
+DEBUG_ENV_VAR = "INJURY_EXTRACTION_DEBUG"
+
+
+def debug_enabled():
+    """Return True if debug artifacts are switched on through the environment."""
+    return os.environ.get(DEBUG_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class DebugWriter:
+    """Runs debug-artifact jobs on a background thread.
+
+    Extraction only enqueues work; encoding and writing the PNGs happens on the
+    writer thread. Pending jobs are flushed when the process exits.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        self._queue.put((func, args, kwargs))
+
+    def flush(self):
+        """Block until every submitted job has been written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                print(f"Failed to write debug output:\n{traceback.format_exc()}")
+            finally:
+                self._queue.task_done()
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_debug_writer():
+    """Return the process-wide DebugWriter, starting it on first use."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        # A forked worker inherits the object but not the thread behind it
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = DebugWriter()
+            _writer_pid = os.getpid()
+            # multiprocessing runs these finalizers at interpreter exit and when a
+            # pool worker shuts down, where plain atexit hooks are skipped
+            util.Finalize(None, _writer.flush, exitpriority=10)
+        return _writer
@@ -1,22 +1,15 @@
-# pip install pypdf
 import re
-from pypdf import PdfReader
-# pip install pdf2image pytesseract opencv-python pillow
-# And install Tesseract on your OS (e.g., brew install tesseract, apt-get install tesseract-ocr)
-from pdf2image import convert_from_path
-import pytesseract, cv2, numpy as np
-import sys
 import os
-from PIL import Image
-from constants.checkbox_map import checkbox_map, checkbox_map_by_type
+import argparse
+from constants.checkbox_map import checkbox_map, checkbox_map_by_type, checkbox_labels_by_type
 from constants.columns import row
 from helpers.iso import parse_date_to_iso
-from helpers.pdf import get_text_info, detect_checkboxes, number_boxes_reading_order, get_checkbox_info, pdf_to_images, save_debug_visualization_with_labels
-from helpers.utils import get_form_type
+from helpers.pdf import open_pdf, get_text_info, detect_checkboxes, number_boxes_reading_order, get_checkbox_info, pdf_to_images, save_debug_visualization_with_labels
+from helpers.sniff import sniff_pdf
+from helpers.debug import debug_enabled
+from helpers.layout import load_layout
 from helpers.extract_pdf_old import extract_info_from_pdf as extract_info_from_pdf_old
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
 SPLIT_RULES = [
 
     {"key": "name", "start": "Name:", "end": "Date of injury:"},
@@ -77,38 +70,46 @@ ILLNESS_SPLIT_RULES = [
 
 
 
-def is_old_format(pdf_path):
+def is_old_format(source):
     """Check if PDF is in old format by searching for the specific text."""
     try:
-        reader = PdfReader(pdf_path)
-        full_text = "\n".join((page.extract_text() or "") for page in reader.pages)
-        old_format_marker = "Denotes kept tick box alternatives not covered in the IOC consensus statement 2020 and the FIFA football consensus extension 2023"
-        return old_format_marker in full_text
+        return sniff_pdf(source)[0] == "old"
     except Exception:
         return False
 
 
-def extract_info_from_pdf(pdf_path):
+def extract_info_from_pdf(pdf_path, save_debug=None, threads=1):
+    # `threads` > 1 detects the checkboxes of several pages at once (see helpers.pdf.detect_pages)
+    # Debug images are off unless requested here or through INJURY_EXTRACTION_DEBUG
+    if save_debug is None:
+        save_debug = debug_enabled()
+
+    # Read and parse the file once; every stage below shares this context
+    doc = open_pdf(pdf_path)
+
+    # Format generation and form type are read from the pages that carry their markers
+    generation, form_type = sniff_pdf(doc)
+
     # Check if this is an old format document
-    if is_old_format(pdf_path):
+    if generation == "old":
         # Use the old extraction function
-        injury_data = extract_info_from_pdf_old(pdf_path)
+        injury_data = extract_info_from_pdf_old(doc)
         # Set FORM_TYPE to "OLD" for old format files
         injury_data["FORM_TYPE"] = "OLD"
         return injury_data
 
     injury_data = row.copy()
 
-    reader = PdfReader(pdf_path)
-    full_text = "\n".join((page.extract_text() or "") for page in reader.pages)
-
-    form_type = get_form_type(full_text)
     injury_data['FORM_TYPE'] = form_type
 
 
     # Adjust these values to crop top/bottom/left/right (in pixels)
     # For 300 DPI: ~100px = 0.33 inches, ~200px = 0.67 inches
-    checkboxes = get_checkbox_info(pdf_path, crop_top=400, crop_bottom=400, crop_left=0, crop_right=0, save_debug=True)
+    # Born-digital forms are read from the PDF drawing layer; scanned pages fall back to raster detection
+    # A learned layout template for the form type (see helpers.layout) skips the contour search on scanned pages
+    # Scanned pages are first tried at 150 DPI and only re-rendered at 300 DPI if the box count is off
+    checkboxes = get_checkbox_info(doc, crop_top=400, crop_bottom=400, crop_left=0, crop_right=0, save_debug=save_debug, backend="auto", layout=load_layout(form_type),
+                                   expected_count=len(checkbox_map_by_type.get(form_type, {})), fast_dpi=150, threads=threads)
 
     if form_type == "HEAD":
         split_rules = SPLIT_RULES + HEAD_SPLIT_RULES
@@ -122,7 +123,7 @@ def extract_info_from_pdf(pdf_path):
         split_rules = SPLIT_RULES + KNEE_SPLIT_RULES
 
 
-    text_info = get_text_info(pdf_path, split_rules)
+    text_info = get_text_info(doc, split_rules)
 
 
     injury_data["NAME"] = text_info["name"]
@@ -130,15 +131,17 @@ def extract_info_from_pdf(pdf_path):
     injury_data["INJURY_DATE"] = parse_date_to_iso(text_info["injury_date"])
     injury_data["RETURN_DATE"] = parse_date_to_iso(text_info["return_date"])
 
+    labels = checkbox_labels_by_type[form_type]
+
     def get_checkbox_data(start, end, get_string=True, has_other=False, other_text="", only_one=False):
-        array = [checkbox_map_by_type[form_type][str(i)] for i in range(start, end) if checkboxes[str(i)]]
+        array = checkboxes.labels_between(labels, start, end)
 
         if has_other and type(has_other) == int:
-            if checkboxes[str(has_other)] == True:
+            if checkboxes[has_other] == True:
                 array = [item for item in array if not item.startswith("Other")]
                 array.append(other_text)
 
-        elif has_other and checkboxes[str(end-1)] == True:
+        elif has_other and checkboxes[end-1] == True:
             if other_text != "":
                 #Remove the one the last one 
                 array = array[:-1]  
@@ -334,15 +337,22 @@ def extract_info_from_pdf(pdf_path):
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Extract injury data from one PDF form")
+    parser.add_argument("pdf_path")
+    parser.add_argument("output_file", nargs="?")
+    parser.add_argument("--debug", action="store_true", help="Write labelled checkbox images into debug/")
+    parser.add_argument("--threads", type=int, default=min(4, os.cpu_count() or 1), help="Pages to detect checkboxes on in parallel (default: %(default)s)")
+    args = parser.parse_args()
+
     print("PDF Extractor")
     print("=" * 50)
     
     
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    pdf_path = sys.argv[1]
+    output_file = args.output_file
+    pdf_path = args.pdf_path
 
 
-    injury_data = extract_info_from_pdf(pdf_path)
+    injury_data = extract_info_from_pdf(pdf_path, save_debug=args.debug or None, threads=args.threads)
     for key, value in injury_data.items():
         print(f"{key}: {value}")
 
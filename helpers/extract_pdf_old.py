@@ -1,20 +1,11 @@
-# pip install pypdf
 import re
-from pypdf import PdfReader
-# pip install pdf2image pytesseract opencv-python pillow
-# And install Tesseract on your OS (e.g., brew install tesseract, apt-get install tesseract-ocr)
-from pdf2image import convert_from_path
-import pytesseract, cv2, numpy as np
 import os
-from PIL import Image
-from constants.checkbox_map import checkbox_map
+from constants.checkbox_map import checkbox_labels
 from constants.columns import row
 from helpers.iso import parse_date_to_iso
-from helpers.pdf import get_text_info, get_checkbox_info
+from helpers.pdf import open_pdf, get_text_info, get_checkbox_info
 
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
 SPLIT_RULES = [
 
     {"key": "name", "start": "Name:", "end": "Team:"},
@@ -40,6 +31,7 @@ SPLIT_RULES = [
 
 
 def extract_info_from_pdf(pdf_path):
+    doc = open_pdf(pdf_path)
     injury_data = row.copy()
 
     swap_map = {
@@ -51,9 +43,9 @@ def extract_info_from_pdf(pdf_path):
         87: 85,
     }
 
-    checkboxes = get_checkbox_info(pdf_path, swap_map=swap_map, old_pdfs=True)
+    checkboxes = get_checkbox_info(doc, swap_map=swap_map, old_pdfs=True)
 
-    text_info = get_text_info(pdf_path, SPLIT_RULES)
+    text_info = get_text_info(doc, SPLIT_RULES)
 
     injury_data["NAME"] = text_info["name"]
     injury_data["TEAM"] = text_info["team"]
@@ -73,7 +65,7 @@ def extract_info_from_pdf(pdf_path):
         injury_data['RETURN_DATE'] = "Wrong date format"
 
 
-    get_checkbox_array = lambda start, end: [checkbox_map[str(i)] for i in range(start, end) if checkboxes[str(i)]]
+    get_checkbox_array = lambda start, end: checkboxes.labels_between(checkbox_labels, start, end)
 
 
     #INJURY_LOCATION
@@ -86,7 +78,7 @@ def extract_info_from_pdf(pdf_path):
 
     #TYPE
     injury_types = get_checkbox_array(23, 41)
-    if checkboxes[str(41)]:
+    if checkboxes[41]:
         if text_info["other_injury"] != "":
             injury_types.append(text_info["other_injury"])
         else:
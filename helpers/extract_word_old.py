@@ -1,12 +1,10 @@
-import zipfile
 import xml.dom.minidom as minidom
 import sys
 import re
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from constants.columns import row
 from helpers.iso import parse_date_to_iso
-from helpers.word import extract_xml_from_docx, get_text_display_from_runs, find_section_bounds, extract_form_fields
+from helpers.word import open_word, SectionIndex, extract_xml_from_docx, collect_form_fields
 
 
 
@@ -17,20 +15,9 @@ def extract_info_from_word(docx_path):
     Extract structured data from UEFA injury form Word document
     """
     
-    namespaces = {
-        'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
-        'w14': 'http://schemas.microsoft.com/office/word/2010/wordml'
-    }
-    
-    # Open docx and read XML
-    with zipfile.ZipFile(docx_path, 'r') as docx_zip:
-        xml_content = docx_zip.read('word/document.xml')
-    
-    root = ET.fromstring(xml_content)
-
-    # Precompute paragraphs and their texts once
-    paragraphs = list(root.findall('.//w:p', namespaces))
-    para_texts = [''.join([t.text for t in p.findall('.//w:t', namespaces) if t.text]) for p in paragraphs]
+    # Reuse the parsed document if the caller already has one
+    doc = open_word(docx_path)
+    para_texts = doc.para_texts
 
 
     injury_data = row.copy()
@@ -39,12 +26,14 @@ def extract_info_from_word(docx_path):
     text_fields = {}
 
     # Extract all form fields
-    text_fields, checkbox_entries, para_texts = extract_form_fields(root, paragraphs, namespaces)
+    text_fields, checkbox_entries = collect_form_fields(doc.fields)
+    # Section markers and checkbox ranges are resolved through one index per document
+    sections = SectionIndex(para_texts, checkbox_entries, doc.fields)
     
    
     # Helper to collect checked labels between two section headers
     def extract_checkbox(start_marker, end_marker=None, only_one=False, num_paragraphs=None, give_additional_info=False):
-        start_idx_local, end_idx_local = find_section_bounds(para_texts, start_marker, end_marker, num_paragraphs)
+        start_idx_local, end_idx_local = sections.bounds(start_marker, end_marker, num_paragraphs)
         results = []
         
         #Hacky way to get additional information out of text fields that should go into other columns
@@ -52,8 +41,8 @@ def extract_info_from_word(docx_path):
         recurrence_return_date = None
         
         if start_idx_local is not None:
-            for entry in checkbox_entries:
-                if entry['checked'] and entry['para_idx'] > start_idx_local and (end_idx_local is None or entry['para_idx'] < end_idx_local):
+            for entry in sections.checkboxes_between(start_idx_local, end_idx_local):
+                if entry['checked']:
                     # Prefer the following text field content if present; otherwise use the checkbox label
                     if entry['label'] == "Match":
                         label_text = "Match"
@@ -117,28 +106,17 @@ def extract_info_from_word(docx_path):
 
     # Helper to collect displayed text from any FORMTEXT inputs between two section headers
     def extract_text(start_marker, end_marker=None, num_paragraphs=None):
-        start_idx_local, end_idx_local = find_section_bounds(para_texts, start_marker, end_marker, num_paragraphs)
+        start_idx_local, end_idx_local = sections.bounds(start_marker, end_marker, num_paragraphs)
         collected = []
         if start_idx_local is None:
             return ""
         # Always include the header paragraph to capture inline fields after the label
         start_p = start_idx_local
-        end_p = len(paragraphs) if end_idx_local is None else end_idx_local
-        for p_idx in range(start_p, end_p):
-            para = paragraphs[p_idx]
-            runs = list(para.findall('.//w:r', namespaces))
-            for i, run in enumerate(runs):
-                fld_begin = run.find('.//w:fldChar[@w:fldCharType="begin"]', namespaces)
-                if fld_begin is None:
-                    continue
-                ffdata = fld_begin.find('.//w:ffData', namespaces)
-                if ffdata is None:
-                    continue
-                if ffdata.find('.//w:textInput', namespaces) is None:
-                    continue
-                text_value = get_text_display_from_runs(runs, i)
-                if text_value:
-                    collected.append(text_value)
+        end_p = doc.paragraph_count if end_idx_local is None else end_idx_local
+        for span in sections.text_fields_between(start_p, end_p):
+            text_value = span['display']
+            if text_value:
+                collected.append(text_value)
         return '; '.join(collected)
 
 
@@ -1,33 +1,103 @@
-   # Normalize dates to ISO (YYYY-MM-DD). If INJURY_DATE can't be parsed, warn and skip the file.
 import re
 from datetime import datetime
+from functools import lru_cache
+
+# Formats tried after ISO, in order; the first one that parses wins
+DATE_FORMATS = [
+    '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y', '%d %m %Y',
+    '%d %b %Y', '%d %B %Y',
+    '%Y/%m/%d', '%Y.%m.%d',
+    '%m/%d/%Y', '%m-%d-%Y',  # fallbacks if someone used US ordering
+]
+
+# Loose shape of what strptime can accept for each directive. Every string a
+# format parses also matches its shape, so a format whose shape does not match
+# can be skipped without calling strptime (and raising) at all.
+_SHAPE_DIRECTIVES = {
+    '%Y': r'\d{4}',
+    '%m': r'\d{1,2}',
+    '%d': r'\s?\d{1,2}',
+    '%b': r'.+?',
+    '%B': r'.+?',
+}
+
+_MIXED_SEPARATORS = re.compile(r'^(\d{1,2})[\./\-](\d{1,2})[\./\-](\d{2,4})$')
+
+
+def _format_shape(fmt):
+    pattern = ''
+    for part in re.split(r'(%[A-Za-z]|\s+)', fmt):
+        if part in _SHAPE_DIRECTIVES:
+            pattern += _SHAPE_DIRECTIVES[part]
+        elif part.isspace():
+            pattern += r'\s+'
+        else:
+            pattern += re.escape(part)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+_FORMAT_SHAPES = [(fmt, _format_shape(fmt)) for fmt in ['%Y-%m-%d'] + DATE_FORMATS]
+
 
 def parse_date_to_iso(date_str):
+    """Return the date as YYYY-MM-DD, '' for an empty value or "Wrong date format"."""
+    if isinstance(date_str, str):
+        return _parse_date_cached(date_str)
+    return _parse_date(date_str)
+
+
+def parse_dates_to_iso(values):
+    """
+    Normalize a whole column of dates at once.
+
+    Every distinct value is parsed once. A pandas Series is mapped to a Series
+    with the same index; any other iterable gives a list.
+    """
+    if hasattr(values, 'factorize') and hasattr(values, 'index'):
+        import numpy as np
+
+        codes, uniques = values.factorize()
+        # Missing values get code -1, which picks the trailing placeholder
+        parsed = np.array([parse_date_to_iso(value) for value in uniques] + [None], dtype=object)
+        result = parsed[codes]
+        for i in np.flatnonzero(codes < 0):
+            # None and NaN are not treated alike by parse_date_to_iso
+            result[i] = parse_date_to_iso(values.iloc[i])
+        return type(values)(result, index=values.index, name=values.name)
+    parsed = {}
+    out = []
+    for value in values:
+        try:
+            if value not in parsed:
+                parsed[value] = parse_date_to_iso(value)
+            out.append(parsed[value])
+        except TypeError:
+            # Unhashable values are parsed without the lookup table
+            out.append(parse_date_to_iso(value))
+    return out
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_cached(date_str):
+    return _parse_date(date_str)
+
+
+def _parse_date(date_str):
     try:
         s = (date_str or '').strip()
         if not s:
             return ''
-        # Already ISO?
-        try:
-            dt = datetime.strptime(s, '%Y-%m-%d')
-            return dt.strftime('%Y-%m-%d')
-        except Exception:
-            pass
-        # Try common day-first formats and a few others
-        candidates = [
-            '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y', '%d %m %Y',
-            '%d %b %Y', '%d %B %Y',
-            '%Y/%m/%d', '%Y.%m.%d',
-            '%m/%d/%Y', '%m-%d-%Y',  # fallbacks if someone used US ordering
-        ]
-        for fmt in candidates:
+        # Already ISO? Then the common day-first formats and a few others
+        for fmt, shape in _FORMAT_SHAPES:
+            if not shape.fullmatch(s):
+                continue
             try:
                 dt = datetime.strptime(s, fmt)
                 return dt.strftime('%Y-%m-%d')
             except Exception:
                 continue
         # Last resort: try extracting digits and reinterpreting dd-mm-yyyy like strings with mixed separators
-        m = re.match(r'^(\d{1,2})[\./\-](\d{1,2})[\./\-](\d{2,4})$', s)
+        m = _MIXED_SEPARATORS.match(s)
         if m:
             d, mo, y = m.groups()
             if len(y) == 2:
@@ -39,4 +109,4 @@ def parse_date_to_iso(date_str):
                 pass
         raise ValueError(f"Unrecognized date format: '{s}'")
     except Exception as e:
-        return "Wrong date format"
\ No newline at end of file
+        return "Wrong date format"
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from constants.checkbox_map import checkbox_map_by_type
+
+LAYOUT_DIR = Path(__file__).resolve().parent.parent / "constants" / "layouts"
+
+
+def learn_layout(reference_pdf, form_type, dpi=300, crop_top=400, crop_bottom=400, crop_left=0, crop_right=0):
+    """Build a checkbox layout template for a form type from a reference PDF.
+
+    Runs full raster detection on the reference and records every box
+    position per page. The number of boxes must match checkbox_map_by_type,
+    so template numbering lines up with the form's checkbox labels.
+    """
+    from helpers.pdf import open_pdf, iter_checkbox_pages
+
+    doc = open_pdf(reference_pdf)
+    pages = []
+    total = 0
+    for idx, boxes in iter_checkbox_pages(doc, dpi=dpi, crop_top=crop_top, crop_bottom=crop_bottom, crop_left=crop_left, crop_right=crop_right):
+        rect = doc.fitz_document.load_page(idx).rect
+        pages.append({
+            "page": idx,
+            "size": [round(rect.width * dpi / 72.0), round(rect.height * dpi / 72.0)],
+            "boxes": [{"number": b["number"], "bbox": list(b["bbox"])} for b in boxes],
+        })
+        total += len(boxes)
+
+    expected = len(checkbox_map_by_type[form_type])
+    if total != expected:
+        raise ValueError(f"Reference '{reference_pdf}' has {total} checkboxes, {form_type} expects {expected}")
+
+    return {
+        "form_type": form_type,
+        "dpi": dpi,
+        "crop": [crop_top, crop_bottom, crop_left, crop_right],
+        "pages": pages,
+    }
+
+
+def save_layout(layout, layout_dir=LAYOUT_DIR):
+    layout_dir = Path(layout_dir)
+    layout_dir.mkdir(parents=True, exist_ok=True)
+    out_path = layout_dir / f"{layout['form_type']}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=1)
+    load_layout.cache_clear()
+    return out_path
+
+
+def layouts_fingerprint(layout_dir=LAYOUT_DIR):
+    """Return a short hash of the stored layout templates, or None if there are none."""
+    paths = sorted(Path(layout_dir).glob("*.json"))
+    if not paths:
+        return None
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def load_layout(form_type, layout_dir=LAYOUT_DIR):
+    """Return the stored layout template for a form type, or None if there is none."""
+    path = Path(layout_dir) / f"{form_type}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def layout_page(layout, page_idx, page_points, crop):
+    """Return the template page for a page of `page_points` (width, height in points), or None if it does not apply.
+
+    Template boxes are in REFERENCE_DPI pixels, so a template applies at any
+    render DPI; sample_layout scales them to the rendered image.
+    """
+    if layout is None or list(crop) != layout["crop"]:
+        return None
+    if page_idx >= len(layout["pages"]):
+        return None
+    page = layout["pages"][page_idx]
+    if [round(v * layout["dpi"] / 72.0) for v in page_points] != page["size"]:
+        return None
+    return page
+
+
+def _edge_strength(bw, x, y, w, h, tolerance):
+    """Darkness of the weakest of the four box edges, allowing a small misalignment."""
+    H, W = bw.shape[:2]
+    y0, y1 = max(0, y - tolerance), min(H, y + h + tolerance)
+    x0, x1 = max(0, x - tolerance), min(W, x + w + tolerance)
+    if y1 - y0 <= 2 * tolerance or x1 - x0 <= 2 * tolerance:
+        return 0.0
+    band = bw[y0:y1, x0:x1] > 0
+    rows = band[:, tolerance:band.shape[1] - tolerance].mean(axis=1)
+    cols = band[tolerance:band.shape[0] - tolerance, :].mean(axis=0)
+    half_r = len(rows) // 2
+    half_c = len(cols) // 2
+    return min(rows[:half_r].max(), rows[half_r:].max(), cols[:half_c].max(), cols[half_c:].max())
+
+
+def sample_layout(bw, page, origin=(0, 0), min_aligned=0.95, tolerance=3, scale=1.0):
+    """Score the template boxes of one page against its binarized image.
+
+    `bw` is the thresholded (cropped) page and `origin` its position on the page,
+    both at the render DPI. `scale` is the render DPI relative to REFERENCE_DPI;
+    template boxes and `tolerance` are scaled by it, the returned bboxes stay in
+    REFERENCE_DPI pixels. Returns the boxes with fill ratio and checked state,
+    or None if the quick alignment check fails and full detection should be used
+    instead.
+    """
+    from helpers.pdf import CHECKED_FILL_RATIO, integral_image, fill_ratios, scale_bbox
+
+    origin_x, origin_y = origin
+    tolerance = max(1, int(round(tolerance * scale)))
+    H, W = bw.shape[:2]
+    fills = []
+    inside = []
+    aligned = 0
+    for tb in page["boxes"]:
+        x, y, w, h = scale_bbox(tuple(tb["bbox"]), scale)
+        x, y = x - origin_x, y - origin_y
+        if _edge_strength(bw, x, y, w, h, tolerance) >= 0.6:
+            aligned += 1
+        if w > 0 and h > 0 and 0 <= x and 0 <= y and x + w <= W and y + h <= H:
+            # Scored below from the summed-area table, all boxes at once
+            inside.append((len(fills), (x, y, w, h)))
+            fills.append(None)
+            continue
+        # Boxes cut off by the crop are measured on what is left of them
+        roi = bw[max(0, y):y+h, max(0, x):x+w]
+        if roi.size == 0:
+            return None
+        border = max(1, min(w, h)//7)
+        inner = roi[border:h-border, border:w-border] if (h-2*border) > 0 and (w-2*border) > 0 else roi
+        fills.append(inner.mean()/255.0)
+
+    if inside:
+        for (i, _), fill in zip(inside, fill_ratios(integral_image(bw), [rect for _, rect in inside])):
+            fills[i] = fill
+
+    boxes = [
+        {"bbox": tuple(tb["bbox"]), "fill_ratio": fill, "checked": fill > CHECKED_FILL_RATIO}
+        for tb, fill in zip(page["boxes"], fills)
+    ]
+
+    if not boxes or aligned < min_aligned * len(boxes):
+        return None
+    return boxes
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("\nUsage: python -m helpers.layout <FORM_TYPE> <reference.pdf>")
+        print("\nLearns the checkbox positions of a form type from a clean reference PDF.")
+        sys.exit(1)
+
+    form_type = sys.argv[1]
+    layout = learn_layout(sys.argv[2], form_type)
+    out_path = save_layout(layout)
+    print(f"Saved {form_type} layout with {sum(len(p['boxes']) for p in layout['pages'])} boxes to {out_path}")
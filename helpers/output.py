@@ -0,0 +1,273 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from constants.columns import column_names, categorical_columns
+
+
+def output_columns(priority=()):
+    """Return the output column order: `priority` first, then column_names without duplicates."""
+    columns = list(priority)
+    for name in column_names:
+        if name not in columns:
+            columns.append(name)
+    return columns
+
+
+def _cell_value(value):
+    # Extractors return strings; anything else (lists, numpy scalars, ...) is written as text
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class RowWriter(ABC):
+    """
+    Writes extracted rows to a file as they are produced.
+
+    The column order is fixed up front, so rows never have to be held in memory
+    to work out the header. The file is only created once the first row
+    arrives, and is flushed every `flush_every` rows.
+    """
+
+    FLUSH_EVERY = 50
+
+    def __init__(self, path, columns, flush_every=None):
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.flush_every = flush_every or self.FLUSH_EVERY
+        self.rows_written = 0
+        self._opened = False
+
+    def write(self, row):
+        if not self._opened:
+            self._open()
+            self._opened = True
+        self._write([_cell_value(row.get(name, "")) for name in self.columns])
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._flush()
+
+    def close(self):
+        if self._opened:
+            self._close()
+            self._opened = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Also on errors, so everything written so far ends up on disk
+        self.close()
+
+    @abstractmethod
+    def _open(self):
+        pass
+
+    @abstractmethod
+    def _write(self, values):
+        pass
+
+    def _flush(self):
+        pass
+
+    @abstractmethod
+    def _close(self):
+        pass
+
+
+class CsvRowWriter(RowWriter):
+    """Append-only CSV with a header row; every flushed row survives a crash."""
+
+    def _open(self):
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(self.columns)
+
+    def _write(self, values):
+        self._csv.writerow(["" if v is None else v for v in values])
+
+    def _flush(self):
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonlRowWriter(RowWriter):
+    """One JSON object per line, keys in column order; every flushed row survives a crash."""
+
+    def _open(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def _write(self, values):
+        self._file.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False) + "\n")
+
+    def _flush(self):
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class XlsxRowWriter(RowWriter):
+    """
+    Excel workbook written with openpyxl's write-only mode.
+
+    Rows are streamed to a temporary file instead of building a worksheet in
+    memory. The .xlsx itself only becomes readable when the writer is closed.
+    """
+
+    def _open(self):
+        # pip install openpyxl
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Sheet1")
+        self._sheet.append(self.columns)
+
+    def _write(self, values):
+        self._sheet.append(values)
+
+    def _close(self):
+        self._workbook.save(self.path)
+
+
+class ArrowRowWriter(RowWriter):
+    """
+    Columnar output through pyarrow, written in record batches of `flush_every` rows.
+
+    Every column is a string column; the columns in `categorical_columns` are
+    dictionary-encoded. Each dictionary only grows, so later batches add
+    dictionary deltas, which the Arrow IPC file format requires.
+    """
+
+    FLUSH_EVERY = 1000
+
+    def __init__(self, path, columns, flush_every=None, categorical=None):
+        super().__init__(path, columns, flush_every)
+        try:
+            # pip install pyarrow
+            import pyarrow
+        except ImportError:
+            raise ImportError(f"Writing {self.path.suffix} files requires pyarrow (pip install pyarrow)") from None
+        self._pa = pyarrow
+        categorical = categorical_columns if categorical is None else categorical
+        self._categorical = [name in categorical for name in self.columns]
+        dictionary_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        self.schema = pyarrow.schema([
+            (name, dictionary_type if is_categorical else pyarrow.string())
+            for name, is_categorical in zip(self.columns, self._categorical)
+        ])
+        self._dictionaries = [{} if is_categorical else None for is_categorical in self._categorical]
+        self._buffer = [[] for _ in self.columns]
+
+    def _write(self, values):
+        for column, value in zip(self._buffer, values):
+            column.append(None if value is None else str(value))
+
+    def _flush(self):
+        if not self._buffer[0]:
+            return
+        pa = self._pa
+        arrays = []
+        for values, dictionary in zip(self._buffer, self._dictionaries):
+            if dictionary is None:
+                arrays.append(pa.array(values, type=pa.string()))
+                continue
+            indices = [None if v is None else dictionary.setdefault(v, len(dictionary)) for v in values]
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()), pa.array(list(dictionary), type=pa.string())))
+        self._write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._buffer = [[] for _ in self.columns]
+
+    def _close(self):
+        self._flush()
+        self._close_writer()
+
+    @abstractmethod
+    def _write_batch(self, batch):
+        pass
+
+    @abstractmethod
+    def _close_writer(self):
+        pass
+
+
+class ParquetRowWriter(ArrowRowWriter):
+    """Parquet file, one row group per batch."""
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(self.path, self.schema)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def _close_writer(self):
+        self._writer.close()
+
+
+class ArrowIpcRowWriter(ArrowRowWriter):
+    """Arrow IPC (Feather v2) file, readable with pyarrow.ipc.open_file or pandas.read_feather."""
+
+    def _open(self):
+        import pyarrow.ipc as ipc
+
+        self._sink = self._pa.OSFile(str(self.path), "wb")
+        options = ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        self._writer = ipc.new_file(self._sink, self.schema, options=options)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def _close_writer(self):
+        self._writer.close()
+        self._sink.close()
+
+
+class RowWriterGroup:
+    """Writes every row to several RowWriters, e.g. xlsx and parquet in one run."""
+
+    def __init__(self, writers):
+        self.writers = list(writers)
+
+    @property
+    def rows_written(self):
+        return self.writers[0].rows_written if self.writers else 0
+
+    def write(self, row):
+        for writer in self.writers:
+            writer.write(row)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+ROW_WRITERS = {
+    "xlsx": XlsxRowWriter,
+    "csv": CsvRowWriter,
+    "jsonl": JsonlRowWriter,
+    "parquet": ParquetRowWriter,
+    "arrow": ArrowIpcRowWriter,
+}
+
+
+def open_row_writer(path, columns, output_format=None, **options):
+    """Return the RowWriter for `output_format` (default: the suffix of `path`)."""
+    output_format = output_format or Path(path).suffix.lstrip(".").lower()
+    if output_format not in ROW_WRITERS:
+        raise ValueError(f"Unsupported output format '{output_format}', expected one of {', '.join(ROW_WRITERS)}")
+    return ROW_WRITERS[output_format](path, columns, **options)
+
+
+def open_row_writers(paths, columns, **options):
+    """Return a RowWriterGroup with one writer per output path (format taken from the suffix)."""
+    return RowWriterGroup(open_row_writer(path, columns, **options) for path in paths)
@@ -1,22 +1,131 @@
-# pip install pypdf
+# pip install pypdf pymupdf opencv-python numpy
+# They are imported where they are used, so code paths that never touch a PDF
+# (e.g. a run over .docx files only) do not pay for loading them
+import heapq
 import re
-from pypdf import PdfReader
-# pip install pdf2image pytesseract opencv-python pillow
-# And install Tesseract on your OS (e.g., brew install tesseract, apt-get install tesseract-ocr)
-from pdf2image import convert_from_path
-import pytesseract, cv2, numpy as np
 import os
-from PIL import Image
+import threading
 from constants.checkbox_map import checkbox_map, checkbox_map_by_type
 from constants.columns import row
 from helpers.iso import parse_date_to_iso
-import fitz
+from helpers.debug import get_debug_writer
+from helpers.layout import layout_page, sample_layout
+import io
+
+
+class PdfDocument:
+    """Per-file PDF context shared by format detection, text extraction and rendering.
+
+    The file is read once; pypdf parsing and page text are computed on first use
+    and cached, so every stage works off the same data. Rendered pages are not
+    kept: they are produced one at a time by iter_images and released by the
+    caller, which keeps memory flat regardless of page count.
+    """
+
+    def __init__(self, pdf_path):
+        self.path = str(pdf_path)
+        with open(self.path, "rb") as f:
+            self.data = f.read()
+        self._reader = None
+        self._page_texts = None
+        self._page_text_cache = {}
+        self._full_text = None
+        self._fitz_document = None
+
+    @property
+    def name(self):
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    @property
+    def reader(self):
+        from pypdf import PdfReader
+        if self._reader is None:
+            self._reader = PdfReader(io.BytesIO(self.data))
+        return self._reader
+
+    @property
+    def text_page_count(self):
+        return len(self.reader.pages)
+
+    def page_text(self, page_idx):
+        """Text of one page, extracted on first use; negative indexes count from the end."""
+        page_idx = range(self.text_page_count)[page_idx]
+        if page_idx not in self._page_text_cache:
+            self._page_text_cache[page_idx] = self.reader.pages[page_idx].extract_text() or ""
+        return self._page_text_cache[page_idx]
+
+    @property
+    def page_texts(self):
+        if self._page_texts is None:
+            self._page_texts = [self.page_text(idx) for idx in range(self.text_page_count)]
+        return self._page_texts
+
+    @property
+    def full_text(self):
+        if self._full_text is None:
+            self._full_text = "\n".join(self.page_texts)
+        return self._full_text
+
+    @property
+    def fitz_document(self):
+        import fitz
+        if self._fitz_document is None:
+            self._fitz_document = fitz.open(stream=self.data, filetype="pdf")
+        return self._fitz_document
+
+    def open_fitz(self):
+        """Open a separate PyMuPDF document on the same data, e.g. one per thread."""
+        import fitz
+        return fitz.open(stream=self.data, filetype="pdf")
+
+    @property
+    def page_count(self):
+        return len(self.fitz_document)
+
+    def render_page(self, page_idx, dpi=300, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, colorspace="rgb", document=None):
+        """Render one page as an array.
+
+        Crop values are in pixels at `dpi`; only the remaining area is rendered.
+        colorspace is "rgb" for an (h, w, 3) array or "gray" for an (h, w) array.
+        `document` is the PyMuPDF document to render from (default: fitz_document).
+        """
+        import numpy as np
+        import fitz
+        page = (document or self.fitz_document).load_page(page_idx)
+        clip = None
+        if crop_top or crop_bottom or crop_left or crop_right:
+            scale = dpi / 72.0
+            r = page.rect
+            clip = fitz.Rect(r.x0 + crop_left / scale, r.y0 + crop_top / scale,
+                             r.x1 - crop_right / scale, r.y1 - crop_bottom / scale)
+        cs = fitz.csGRAY if colorspace == "gray" else fitz.csRGB
+        # Render page to a pixmap (like an image)
+        pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=cs, alpha=False)
+        # Convert to numpy array (just like pdf2image)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        if pix.n == 1:
+            img = img[:, :, 0]
+        return img
+
+    def iter_images(self, dpi=300, **render_options):
+        """Yield the pages rendered one at a time, see render_page for the options."""
+        for idx in range(self.page_count):
+            yield self.render_page(idx, dpi, **render_options)
+
+
+def open_pdf(source):
+    """Return `source` if it already is a PdfDocument, otherwise open the path."""
+    if isinstance(source, PdfDocument):
+        return source
+    return PdfDocument(source)
 
 
+def get_text_info(source, split_rules: list) -> dict:
+    return split_text(open_pdf(source).full_text, split_rules)
 
-def get_text_info(pdf_path: str, split_rules: list) -> dict:
-    reader = PdfReader(pdf_path)
-    full_text = "\n".join((page.extract_text() or "") for page in reader.pages)
+
+def split_text(full_text, split_rules):
+    """Return {rule key: text between the rule's start and end patterns}."""
     out = {}
 
     for rule in split_rules:
@@ -25,67 +134,124 @@ def get_text_info(pdf_path: str, split_rules: list) -> dict:
 
         # Find absolute start index
         abs_start = full_text.find(start_pat)
-        if "second_start" in rule:
-            #Start from the second time the start pattern is found
+        if abs_start != -1 and "second_start" in rule:
+            # Start from the second time the start pattern is found
             abs_start = full_text.find(start_pat, abs_start + len(start_pat))
         if abs_start == -1:
             out[rule["key"]] = ""
             continue
 
-    
-
-        # Start searching right after the start pattern
+        # Start searching right after the start pattern; offsets into full_text
+        # instead of a remainder copy per rule
         cursor = abs_start + len(start_pat)
-        remainder = full_text[cursor:]
 
         if end_pat == "\n":
             # Capture only until the very next newline
-            nl_idx = remainder.find("\n")
-            if nl_idx == -1:
-                value = remainder.strip()
-            else:
-                value = remainder[:nl_idx].strip()
+            nl_idx = full_text.find("\n", cursor)
+            value = full_text[cursor:] if nl_idx == -1 else full_text[cursor:nl_idx]
         else:
             # Capture across lines until the exact end token
-            end_idx = remainder.find(end_pat)
-            if end_idx == -1:
-                value = ""
-            else:
-                value = remainder[:end_idx].strip()
+            end_idx = full_text.find(end_pat, cursor)
+            value = "" if end_idx == -1 else full_text[cursor:end_idx]
 
         out[rule["key"]] = value.strip()
 
     return out
 
 
-def detect_checkboxes(img, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, old_pdfs=False):
-    # Crop the image if needed
-    h, w = img.shape[:2]
-    img_cropped = img[crop_top:h-crop_bottom, crop_left:w-crop_right]
-    
-    gray = cv2.cvtColor(img_cropped, cv2.COLOR_RGB2GRAY)
+# Pixel values (crop margins, box sizes, bboxes) are expressed at this DPI,
+# whatever resolution a page is actually rendered at
+REFERENCE_DPI = 300
+
+
+def scale_bbox(bbox, factor):
+    if factor == 1:
+        return bbox
+    return tuple(int(round(v * factor)) for v in bbox)
+
+
+def binarize(img, old_pdfs=False):
+    """Threshold a page image to white-on-black ink, as used for checkbox detection."""
+    import cv2
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
     blur = cv2.GaussianBlur(gray, (3,3), 0)
     # Replace adaptive threshold with OTSU (automatic global threshold)
 
     if old_pdfs:
         bw = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
                                cv2.THRESH_BINARY_INV, 31, 10)
-        mode = cv2.RETR_EXTERNAL
     else:
         _, bw = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        mode = cv2.RETR_LIST
+    return bw
+
+
+# A box counts as checked when more than this share of its inside is ink
+CHECKED_FILL_RATIO = 0.15
+
+
+def integral_image(bw):
+    """Summed-area table of a binarized (0/255) image, counting ink pixels.
+
+    Entry [y, x] is the number of non-zero pixels above and left of (x, y);
+    the table has one more row and column than the image.
+    """
+    import cv2
+    import numpy as np
+    return cv2.integral((bw > 0).view(np.uint8))
+
+
+def fill_ratios(sat, rects, border_divisor=7):
+    """Return the ink share (0..1) inside each (x, y, w, h) rect, from integral_image().
+
+    A border of min(w, h)//border_divisor pixels (at least 1) is left out so
+    the outline of the box does not count; boxes too small for that border are
+    measured whole. Equal to bw[inner].mean()/255 for each rect that lies inside
+    the image.
+    """
+    import numpy as np
+    rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+    x, y, w, h = rects.T
+    border = np.maximum(1, np.minimum(w, h) // border_divisor)
+    # Boxes too small for the border are measured whole
+    border = np.where((h - 2*border > 0) & (w - 2*border > 0), border, 0)
+    x0, y0 = x + border, y + border
+    x1, y1 = x + w - border, y + h - border
+    ink = sat[y1, x1].astype(np.int64) - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]
+    # Scaled to 0/255 values first, so the result matches a mean over the thresholded image exactly
+    return ink * 255 / ((y1 - y0) * (x1 - x0)) / 255.0
+
+
+def detect_checkboxes(img, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, old_pdfs=False, origin=(0, 0), scale=1.0):
+    # `origin` is where img's top-left corner sits on the page, for images that
+    # were already rendered cropped. `scale` is the render DPI relative to
+    # REFERENCE_DPI: size limits are scaled to it and the returned boxes are
+    # mapped back to reference-DPI pixels.
+    import cv2
+    import numpy as np
+    origin_x, origin_y = origin
+    # Crop the image if needed
+    h, w = img.shape[:2]
+    img_cropped = img[crop_top:h-crop_bottom, crop_left:w-crop_right]
+    
+    bw = binarize(img_cropped, old_pdfs=old_pdfs)
+    mode = cv2.RETR_EXTERNAL if old_pdfs else cv2.RETR_LIST
     cnts, _ = cv2.findContours(bw, mode, cv2.CHAIN_APPROX_SIMPLE)
 
-    boxes = []
-    for i, c in enumerate(cnts):
-        x,y,w,h = cv2.boundingRect(c)
-        # if w == 0 or h == 0:
-        #     continue
-        aspect_ratio = w/float(h)
-        # Stricter size and aspect to ignore small round letters
-        if not (20 <= w <= 60 and 20 <= h <= 60 and 0.92 <= aspect_ratio <= 1.08):
-            continue
-
+    # Size and aspect checks run on all contours at once; only the few
+    # box-sized candidates go through the polygon checks below
+    rects = contour_bounding_rects(cnts)
+    rw = rects[:, 2]
+    rh = rects[:, 3]
+    aspect = rw / rh.astype(np.float64)
+    # Stricter size and aspect to ignore small round letters
+    candidates = np.flatnonzero(
+        (20*scale <= rw) & (rw <= 60*scale) & (20*scale <= rh) & (rh <= 60*scale) & (0.92 <= aspect) & (aspect <= 1.08)
+    )
+
+    accepted = []
+    for i in candidates:
+        c = cnts[i]
+        x, y, w, h = (int(v) for v in rects[i])
 
         # polygonal approximation to prefer rectangular shapes
         peri = cv2.arcLength(c, True)
@@ -113,24 +279,38 @@ def detect_checkboxes(img, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0,
             continue
 
 
-        # Measure fill ratio excluding a small border to avoid counting the outline
-        roi = bw[y:y+h, x:x+w]
-        border = max(1, min(w, h)//7)
-        inner = roi[border:h-border, border:w-border] if (h-2*border) > 0 and (w-2*border) > 0 else roi
-        fill = inner.mean()/255.0  # 0..1
+        accepted.append((x, y, w, h))
 
-        # Adjust coordinates back to original image space
-        boxes.append({"bbox": (x+crop_left, y+crop_top, w, h), "fill_ratio": fill})
+    boxes = []
+    if accepted:
+        # Measure fill ratio excluding a small border to avoid counting the outline
+        fills = fill_ratios(integral_image(bw), accepted)
+        for (x, y, w, h), fill in zip(accepted, fills):
+            # Adjust coordinates back to original image space
+            boxes.append({"bbox": scale_bbox((x+crop_left+origin_x, y+crop_top+origin_y, w, h), 1.0/scale), "fill_ratio": fill})
 
     # Heuristic: filled if inside mean > threshold
     for b in boxes:
-        b["checked"] = b["fill_ratio"] > 0.15
+        b["checked"] = b["fill_ratio"] > CHECKED_FILL_RATIO
 
     boxes = remove_duplicate_boxes(boxes)
 
     return boxes
 
 
+def contour_bounding_rects(cnts):
+    """Return the cv2.boundingRect of every contour as an N x 4 array of (x, y, w, h)."""
+    import numpy as np
+    if len(cnts) == 0:
+        return np.empty((0, 4), dtype=np.int64)
+    points = np.concatenate([c.reshape(-1, 2) for c in cnts]).astype(np.int64)
+    starts = np.zeros(len(cnts), dtype=np.int64)
+    np.cumsum([len(c) for c in cnts[:-1]], out=starts[1:])
+    lo = np.minimum.reduceat(points, starts)
+    hi = np.maximum.reduceat(points, starts)
+    return np.hstack([lo, hi - lo + 1])
+
+
 def number_boxes_reading_order(boxes, row_merge_px=25, swap_map=None):
     # Assign a reading-order number to each box: left-to-right within rows, rows top-to-bottom
     if not boxes:
@@ -178,68 +358,313 @@ def number_boxes_reading_order(boxes, row_merge_px=25, swap_map=None):
     return ordered
 
 
-def get_checkbox_info(pdf_path: str, save_debug=False, debug_dir="debug", swap_map=None, old_pdfs=False, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0):
-    imgs = pdf_to_images(pdf_path)
-    box_map = {}
+def detect_checkboxes_vector(page, dpi=300, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0):
+    """Detect tick boxes of a born-digital page from its form widgets and drawing layer.
+
+    Returns boxes in the same pixel space as detect_checkboxes on a page rendered
+    at `dpi`, so numbering and crop values are interchangeable. Returns an empty
+    list when the page has no vector boxes (e.g. a scanned page).
+    """
+    import numpy as np
+    import fitz
+    scale = dpi / 72.0
+    to_pixels = page.rotation_matrix * fitz.Matrix(scale, scale)
+    page_rect = page.rect * to_pixels
+    clip = fitz.Rect(page_rect.x0 + crop_left, page_rect.y0 + crop_top, page_rect.x1 - crop_right, page_rect.y1 - crop_bottom)
+
+    def is_box_sized(rect):
+        w, h = rect.width, rect.height
+        return 20 <= w <= 60 and 20 <= h <= 60 and 0.92 <= w / h <= 1.08
+
+    def to_box(rect, checked):
+        x, y = int(round(rect.x0)), int(round(rect.y0))
+        w, h = int(round(rect.width)), int(round(rect.height))
+        return {"bbox": (x, y, w, h), "fill_ratio": 1.0 if checked else 0.0, "checked": checked}
+
+    boxes = []
+
+    # Interactive form fields carry their state directly
+    for widget in page.widgets(types=[fitz.PDF_WIDGET_TYPE_CHECKBOX, fitz.PDF_WIDGET_TYPE_RADIOBUTTON]):
+        rect = widget.rect * to_pixels
+        if is_box_sized(rect) and clip.contains(rect):
+            checked = widget.field_value not in (None, False, "", "Off")
+            boxes.append(to_box(rect, checked))
+
+    # Drawn boxes: square rectangles in the page content
+    drawings = page.get_drawings()
+    squares = []
+    for drawing in drawings:
+        for item in drawing["items"]:
+            if item[0] == "re":
+                rect = item[1] * to_pixels
+            elif item[0] == "qu":
+                rect = item[1].rect * to_pixels
+            else:
+                continue
+            if not (is_box_sized(rect) and clip.contains(rect)):
+                continue
+            fill = drawing.get("fill")
+            # A box filled with a dark colour is a ticked box
+            filled = fill is not None and sum(fill) < 1.5 and (drawing.get("fill_opacity") or 1.0) > 0.5
+            squares.append((rect, filled))
+
+    if not boxes and not squares:
+        return []
+
+    # Tick marks: other paths that sit inside a drawn box
+    marks = []
+    for drawing in drawings:
+        rect = drawing["rect"] * to_pixels
+        if not (is_box_sized(rect) and len(drawing["items"]) == 1 and drawing["items"][0][0] in ("re", "qu")):
+            marks.append(tuple(rect))
+    marks = np.array(marks, dtype=np.float64).reshape(-1, 4)
+    mark_areas = (marks[:, 2] - marks[:, 0]) * (marks[:, 3] - marks[:, 1])
+
+    # Typed ticks ("X", "✓"): a character's bbox spans the font's ascender and
+    # descender and can be taller than the box, so glyphs count by their centre
+    glyph_centres = []
+    for block in page.get_text("rawdict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    if char["c"].strip():
+                        r = fitz.Rect(char["bbox"]) * to_pixels
+                        glyph_centres.append(((r.x0 + r.x1) / 2, (r.y0 + r.y1) / 2))
+    glyph_centres = np.array(glyph_centres, dtype=np.float64).reshape(-1, 2)
+
+    widget_bboxes = [b["bbox"] for b in boxes]
+    for rect, filled in squares:
+        # Allow for the outline stroke around the box
+        x0, y0, x1, y1 = rect.x0 - 2, rect.y0 - 2, rect.x1 + 2, rect.y1 + 2
+        inside = (marks[:, 0] >= x0) & (marks[:, 1] >= y0) & (marks[:, 2] <= x1) & (marks[:, 3] <= y1)
+        ticked = (glyph_centres[:, 0] >= rect.x0) & (glyph_centres[:, 0] <= rect.x1) & (glyph_centres[:, 1] >= rect.y0) & (glyph_centres[:, 1] <= rect.y1)
+        checked = filled or bool(np.any(inside & (mark_areas < 0.9 * rect.get_area()))) or bool(np.any(ticked))
+        box = to_box(rect, checked)
+        # Drawn appearance of a widget that was already read
+        if any(calculate_iou(box["bbox"], wb) >= 0.5 for wb in widget_bboxes):
+            continue
+        boxes.append(box)
+
+    return remove_duplicate_boxes(boxes)
+
+
+def iter_checkbox_pages(source, save_debug=False, debug_dir="debug", **options):
+    """Yield (page index, numbered boxes) for each page of a PDF.
+
+    Pages are rendered, detected and released one at a time, so at most one
+    page image is alive at any point. Box numbers are cumulative across pages.
+    Accepts the detection options of detect_pages; with `save_debug`, labelled
+    images of every page are written to `debug_dir`.
+    """
+    doc = open_pdf(source)
     if save_debug:
         os.makedirs(debug_dir, exist_ok=True)
-    
+
     # Track cumulative box number across all pages
     cumulative_box_number = 0
-    
-    for idx, img in enumerate(imgs):
-        boxes = detect_checkboxes(img, old_pdfs=old_pdfs, crop_top=crop_top, crop_bottom=crop_bottom, crop_left=crop_left, crop_right=crop_right)
-
-        
-        # Number boxes in reading order
-        boxes = number_boxes_reading_order(boxes, swap_map=swap_map)
-        
-        # Renumber boxes to be cumulative across pages
-        for box in boxes:
-            cumulative_box_number += 1
-            box["number"] = cumulative_box_number
-        
+
+    for idx, page in detect_pages(doc, keep_images=save_debug, **options):
+        cumulative_box_number = _number_boxes(page["boxes"], cumulative_box_number)
         if save_debug:
-            base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-            out_labeled = os.path.join(debug_dir, f"{base_name}_page{idx+1}.png")
-            save_debug_visualization_with_labels(img, boxes, out_labeled)
-            # Save intermediates for tuning
-            # Recompute the intermediates used in detection for export
-            gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-            blur = cv2.GaussianBlur(gray, (3,3), 0)
-            bw = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
-                                       cv2.THRESH_BINARY_INV, 31, 10)
-            open_k = cv2.getStructuringElement(cv2.MORPH_RECT, (3,3))
-    
-            cv2.imwrite(os.path.join(debug_dir, f"page_{idx+1}_bw.png"), bw)
-   
-        # Store checkbox states in box_map
-        for box in boxes:
-            box_map[str(box["number"])] = box["checked"]
-        
-    return box_map
-
-def pdf_to_images(pdf_path: str, dpi=300):
-    pdf_document = fitz.open(pdf_path)
-    images = []
-
-    for page_num in range(len(pdf_document)):
-        page = pdf_document.load_page(page_num)
-        # Render page to a pixmap (like an image)
-        pix = page.get_pixmap(dpi=dpi)
-        # Convert to numpy RGB array (just like pdf2image)
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
-        if pix.n == 4:  # remove alpha channel if present
-            img = img[:, :, :3]
-        images.append(img)
+            _submit_debug_images(doc, idx, page, debug_dir)
+        yield idx, page["boxes"]
+
+
+def detect_pages(source, pages=None, swap_map=None, old_pdfs=False, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, backend="raster", dpi=REFERENCE_DPI, layout=None, threads=1, keep_images=False):
+    """Yield (page index, page result) for the pages of a PDF (all, or the indexes in `pages`).
+
+    A page result is a dict with "boxes" (in reading order within the page, not
+    yet numbered), "method" ("vector", "template" or "raster"), "dpi" and
+    "origin" (render DPI and the crop origin in render pixels) and "image" (the
+    rendered page with `keep_images`, otherwise None).
+
+    `backend` selects the detector: "raster" renders every page and finds boxes
+    with OpenCV, "vector" reads them from the PDF drawing layer and form widgets,
+    and "auto" uses the vector detector and falls back to the raster pipeline for
+    pages without vector boxes (scanned pages).
+
+    `dpi` is the raster render resolution. Crop values and the returned bboxes
+    are always in REFERENCE_DPI pixels, so results from different DPIs line up.
+
+    `layout` is an optional template from helpers.layout. On the raster path its
+    known box positions are sampled directly; pages that fail the alignment
+    check fall back to full detection.
+
+    With `threads` > 1, pages are rendered and detected on a thread pool (MuPDF
+    and OpenCV release the GIL), each thread on its own PyMuPDF document. Pages
+    are still yielded in order; up to `threads` page images are alive at once
+    (with keep_images, images wait until their page is yielded).
+    """
+    doc = open_pdf(source)
+    pages = range(doc.page_count) if pages is None else list(pages)
+
+    scale = dpi / REFERENCE_DPI
+    render_crop = dict(
+        crop_top=int(round(crop_top * scale)), crop_bottom=int(round(crop_bottom * scale)),
+        crop_left=int(round(crop_left * scale)), crop_right=int(round(crop_right * scale)),
+    )
+    render_origin = (render_crop["crop_left"], render_crop["crop_top"])
+    crop = (crop_top, crop_bottom, crop_left, crop_right)
+
+    def detect_page(idx, document):
+        img = None
+        boxes = []
+        method = "vector"
+        if backend in ("vector", "auto"):
+            page = document.load_page(idx)
+            boxes = detect_checkboxes_vector(page, dpi=REFERENCE_DPI, crop_top=crop_top, crop_bottom=crop_bottom, crop_left=crop_left, crop_right=crop_right)
+        if backend == "raster" or (backend == "auto" and not boxes):
+            # Render only the cropped area, in the grayscale the detector works on
+            img = doc.render_page(idx, dpi, colorspace="gray", document=document, **render_crop)
+            rect = document.load_page(idx).rect
+            template_page = layout_page(layout, idx, (rect.width, rect.height), crop)
+            boxes = None
+            if template_page is not None:
+                boxes = sample_layout(binarize(img, old_pdfs=old_pdfs), template_page, origin=render_origin, scale=scale)
+            method = "raster" if boxes is None else "template"
+            if boxes is None:
+                boxes = detect_checkboxes(img, old_pdfs=old_pdfs, origin=render_origin, scale=scale)
+
+        # Number boxes in reading order (template boxes already are)
+        if method != "template":
+            boxes = number_boxes_reading_order(boxes, swap_map=swap_map)
+
+        if keep_images and img is None:
+            img = doc.render_page(idx, dpi, colorspace="gray", document=document, **render_crop)
+        # The page image is only kept for the debug output
+        return {"boxes": boxes, "method": method, "dpi": dpi, "origin": render_origin, "image": img if keep_images else None}
+
+    if threads > 1 and len(pages) > 1:
+        results = _detect_pages_threaded(doc, detect_page, pages, threads)
+    else:
+        results = (detect_page(idx, doc.fitz_document) for idx in pages)
+    yield from zip(pages, results)
+
+
+def _number_boxes(boxes, last_number):
+    # Renumber boxes to be cumulative across pages
+    for box in boxes:
+        last_number += 1
+        box["number"] = last_number
+    return last_number
+
+
+def _submit_debug_images(doc, idx, page, debug_dir):
+    out_labeled = os.path.join(debug_dir, f"{doc.name}_page{idx+1}.png")
+    out_bw = os.path.join(debug_dir, f"page_{idx+1}_bw.png")
+    debug_boxes = [dict(b, bbox=scale_bbox(b["bbox"], page["dpi"] / REFERENCE_DPI)) for b in page["boxes"]]
+    # Drawing and encoding the PNGs happens on the background writer thread
+    get_debug_writer().submit(save_debug_images, page["image"], debug_boxes, out_labeled, out_bw, origin=page["origin"])
+
+
+def _detect_pages_threaded(doc, detect_page, pages, threads):
+    """Run detect_page(idx, document) for the pages on a thread pool; yields the results in order."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    # PyMuPDF documents must not be shared between threads
+    local = threading.local()
+    documents = []
+
+    def run(idx):
+        if not hasattr(local, "document"):
+            local.document = doc.open_fitz()
+            documents.append(local.document)
+        return detect_page(idx, local.document)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(threads, len(pages))) as pool:
+            yield from pool.map(run, pages)
+    finally:
+        for document in documents:
+            document.close()
+
+
+def get_checkbox_info(source, expected_count=None, fast_dpi=None, save_debug=False, debug_dir="debug", **options):
+    """Return a CheckboxState for all tick boxes of a PDF, numbered across pages.
+
+    Accepts the same options as iter_checkbox_pages. If `expected_count` is
+    given, the box count is checked against it:
+
+    - with `fast_dpi`, raster pages are first detected at `fast_dpi`, and only
+      those pages are detected again at full DPI when the count is off;
+    - with backend="auto", pages read from the vector layer are detected on the
+      raster path when the count is still off, and that result is kept if it
+      has the expected count.
+
+    Debug images are only written for the pages of the final result.
+    """
+    doc = open_pdf(source)
+    dpi = options.pop("dpi", REFERENCE_DPI)
+    first_dpi = fast_dpi if expected_count and fast_dpi else dpi
+    pages = dict(detect_pages(doc, dpi=first_dpi, keep_images=save_debug, **options))
+
+    if expected_count and first_dpi != dpi:
+        pages = _redetect_pages(doc, pages, expected_count, ("raster", "template"), dict(options, dpi=dpi, keep_images=save_debug))
+    if expected_count and options.get("backend") == "auto":
+        # A stray square or widget on a scanned page (a stamp, an editor's form
+        # field) makes it a vector page; detect those pages on the raster path
+        pages = _redetect_pages(doc, pages, expected_count, ("vector",), dict(options, dpi=dpi, backend="raster", keep_images=save_debug), require_match=True)
+
+    if save_debug:
+        os.makedirs(debug_dir, exist_ok=True)
+    cumulative_box_number = 0
+    for idx in sorted(pages):
+        cumulative_box_number = _number_boxes(pages[idx]["boxes"], cumulative_box_number)
+        if save_debug:
+            _submit_debug_images(doc, idx, pages[idx], debug_dir)
+    return _collect_box_map((idx, pages[idx]["boxes"]) for idx in sorted(pages))
+
+
+def _redetect_pages(doc, pages, expected_count, methods, options, require_match=False):
+    """Detect the pages found with one of `methods` again if the box count differs from expected_count.
+
+    With `require_match`, the new result is only used if it has the expected count.
+    """
+    if sum(len(page["boxes"]) for page in pages.values()) == expected_count:
+        return pages
+    redo = [idx for idx in sorted(pages) if pages[idx]["method"] in methods]
+    if not redo:
+        return pages
+    updated = dict(pages)
+    updated.update(detect_pages(doc, pages=redo, **options))
+    if require_match and sum(len(page["boxes"]) for page in updated.values()) != expected_count:
+        return pages
+    return updated
+
 
-    return images
+def _collect_box_map(pages):
+    from helpers.checkboxes import CheckboxState
 
+    return CheckboxState.from_boxes(box for _, boxes in pages for box in boxes)
 
-def save_debug_visualization_with_labels(img, boxes, out_path):
-    vis = img.copy()
+
+def iter_page_images(source, dpi=300, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, colorspace="rgb"):
+    return open_pdf(source).iter_images(dpi, crop_top=crop_top, crop_bottom=crop_bottom, crop_left=crop_left, crop_right=crop_right, colorspace=colorspace)
+
+
+def pdf_to_images(source, dpi=300, crop_top=0, crop_bottom=0, crop_left=0, crop_right=0, colorspace="rgb"):
+    return list(iter_page_images(source, dpi, crop_top=crop_top, crop_bottom=crop_bottom, crop_left=crop_left, crop_right=crop_right, colorspace=colorspace))
+
+
+def save_debug_images(img, boxes, out_labeled, out_bw, origin=(0, 0)):
+    import cv2
+    save_debug_visualization_with_labels(img, boxes, out_labeled, origin=origin)
+    # Save intermediates for tuning
+    # Recompute the intermediates used in detection for export
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    blur = cv2.GaussianBlur(gray, (3,3), 0)
+    bw = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                               cv2.THRESH_BINARY_INV, 31, 10)
+    cv2.imwrite(out_bw, bw)
+
+
+def save_debug_visualization_with_labels(img, boxes, out_path, origin=(0, 0)):
+    import cv2
+    vis = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB) if img.ndim == 2 else img.copy()
     for b in boxes:
         x,y,w,h = b["bbox"]
+        # Boxes are in page coordinates, img may be a cropped render
+        x, y = x - origin[0], y - origin[1]
         color = (0,255,0) if b.get("checked") else (0,0,255)
         cv2.rectangle(vis, (x,y), (x+w, y+h), color, 2)
         # Place the assigned number above the box (or inside if too close to top)
@@ -254,19 +679,31 @@ def remove_duplicate_boxes(boxes, iou_threshold=0.5):
     """Remove duplicate/overlapping boxes using Non-Maximum Suppression approach"""
     if not boxes:
         return boxes
-    
+    import numpy as np
+
     # Sort by position (top-to-bottom, left-to-right) to maintain reading order
     # This ensures deduplication preserves spatial ordering
     boxes_sorted = sorted(boxes, key=lambda b: (b["bbox"][1], b["bbox"][0]))  # (y, x)
-    
+    if not iou_threshold > 0:
+        # Every pair of boxes reaches the threshold
+        return boxes_sorted[:1]
+
+    # A box is dropped if it overlaps an already kept box by iou_threshold or
+    # more. Only kept boxes that reach below the top of the current one can
+    # overlap it, so the others leave the active set (a heap keyed by bottom edge).
     keep = []
-    while boxes_sorted:
-        current = boxes_sorted.pop(0)
-        keep.append(current)
-        
-        # Remove boxes that overlap significantly with current
-        boxes_sorted = [b for b in boxes_sorted if calculate_iou(current["bbox"], b["bbox"]) < iou_threshold]
-    
+    active = []
+    for box in boxes_sorted:
+        x, y, w, h = box["bbox"]
+        while active and active[0][0] <= y:
+            heapq.heappop(active)
+        if active:
+            others = np.array([keep[i]["bbox"] for _, i in active])
+            if (calculate_ious(box["bbox"], others) >= iou_threshold).any():
+                continue
+        heapq.heappush(active, (y + h, len(keep)))
+        keep.append(box)
+
     return keep
 
 def calculate_iou(box1, box2):
@@ -288,4 +725,22 @@ def calculate_iou(box1, box2):
     area2 = w2 * h2
     union = area1 + area2 - intersection
     
-    return intersection / union if union > 0 else 0.0
\ No newline at end of file
+    return intersection / union if union > 0 else 0.0
+
+
+def calculate_ious(box, boxes):
+    """calculate_iou of one (x, y, w, h) box against each row of an N x 4 array"""
+    import numpy as np
+    x1, y1, w1, h1 = box
+    x2, y2, w2, h2 = np.asarray(boxes).reshape(-1, 4).T
+
+    x_left = np.maximum(x1, x2)
+    y_top = np.maximum(y1, y2)
+    x_right = np.minimum(x1 + w1, x2 + w2)
+    y_bottom = np.minimum(y1 + h1, y2 + h2)
+
+    overlaps = (x_right >= x_left) & (y_bottom >= y_top)
+    intersection = np.where(overlaps, (x_right - x_left) * (y_bottom - y_top), 0)
+    union = w1 * h1 + w2 * h2 - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(overlaps & (union > 0), intersection / union, 0.0)
@@ -0,0 +1,121 @@
+import html
+import re
+from pathlib import Path
+from helpers.utils import OLD_FORMAT_MARKER, get_form_type
+
+# Result for old-generation forms; their rows get FORM_TYPE "OLD"
+OLD_FORMAT = ("old", "OLD")
+
+# Form types whose heading old-generation forms also contain. These are only
+# returned after the rest of the document is checked for the old-format footnote.
+SHARED_WITH_OLD_FORMAT = ("INJURY",)
+
+# Regions of document.xml that are searched before falling back to a parse.
+# The form type heading is near the start, the old-format footnote at the end.
+HEAD_BYTES = 128 * 1024
+TAIL_BYTES = 64 * 1024
+
+_TEXT_OR_PARAGRAPH_END = re.compile(r'<w:t(?:\s[^>]*)?>([^<]*)</w:t>|(</w:p>)')
+
+
+def sniff_format(path):
+    """Return (generation, form_type) of a .pdf or .docx form, see sniff_pdf and sniff_word."""
+    if Path(str(path)).suffix.lower() == ".pdf":
+        return sniff_pdf(path)
+    return sniff_word(path)
+
+
+def sniff_text(text):
+    """Return (generation, form_type) for text that is known to be the whole document."""
+    if OLD_FORMAT_MARKER in text:
+        return OLD_FORMAT
+    return "new", get_form_type(text)
+
+
+def sniff_pdf(source):
+    """
+    Return (generation, form_type) of a PDF form from as few pages as possible.
+
+    generation is "old" or "new". The old-format footnote is looked for on the
+    last and first page, then the pages are read in order until one has a form
+    type heading. For a heading in SHARED_WITH_OLD_FORMAT the remaining pages
+    are checked for the footnote as well. Page text is extracted lazily and
+    cached on the PdfDocument, so a later full-text extraction does not repeat
+    the work.
+    """
+    from helpers.pdf import open_pdf
+
+    doc = open_pdf(source)
+    page_count = doc.text_page_count
+    if page_count == 0:
+        return "new", "UNKNOWN"
+    for idx in dict.fromkeys([page_count - 1, 0]):
+        if OLD_FORMAT_MARKER in doc.page_text(idx):
+            return OLD_FORMAT
+    for idx in range(page_count):
+        generation, form_type = sniff_text(doc.page_text(idx))
+        if form_type in SHARED_WITH_OLD_FORMAT:
+            if any(OLD_FORMAT_MARKER in doc.page_text(i) for i in range(idx + 1, page_count)):
+                return OLD_FORMAT
+            return generation, form_type
+        if generation == "old" or form_type != "UNKNOWN":
+            return generation, form_type
+    return "new", "UNKNOWN"
+
+
+def _region_text(xml):
+    # Run texts of the region, with a newline at every paragraph end
+    parts = []
+    for text, paragraph_end in _TEXT_OR_PARAGRAPH_END.findall(xml):
+        parts.append("\n" if paragraph_end else html.unescape(text))
+    return "".join(parts)
+
+
+def sniff_word(source):
+    """
+    Return (generation, form_type) of a .docx form without parsing the whole document.
+
+    `source` is a path or a WordDocument, which may not be parsed yet
+    (open_word(path, parse=False)). The run texts in the first HEAD_BYTES and
+    last TAIL_BYTES of the raw document.xml are searched with a regex. If the
+    head has no form type heading, the document is parsed until the first
+    paragraph that has one; that parse is resumed, not repeated, when the
+    document is read in full later. For a heading in SHARED_WITH_OLD_FORMAT
+    the whole document is searched for the old-format footnote. A fully parsed
+    WordDocument is checked on its full text.
+    """
+    from helpers.word import open_word
+
+    doc = open_word(source, parse=False)
+    if doc.complete:
+        return sniff_text(doc.full_text)
+
+    xml = doc.xml
+    if OLD_FORMAT_MARKER in _region_text(xml[-TAIL_BYTES:].decode('utf-8', 'ignore')):
+        return OLD_FORMAT
+    generation, form_type = sniff_text(_region_text(xml[:HEAD_BYTES].decode('utf-8', 'ignore')))
+    if form_type in SHARED_WITH_OLD_FORMAT and len(xml) > HEAD_BYTES:
+        # The footnote can be anywhere after the heading, not only in the tail
+        if OLD_FORMAT_MARKER in _region_text(xml.decode('utf-8', 'ignore')):
+            return OLD_FORMAT
+        return generation, form_type
+    if generation == "old" or form_type != "UNKNOWN" or len(xml) <= HEAD_BYTES:
+        return generation, form_type
+
+    # Fallback: parse paragraphs until one of them identifies the form
+    checked = 0
+
+    def found(doc):
+        nonlocal checked
+        new_texts = doc.para_texts[checked:]
+        checked = doc.paragraph_count
+        return any(sniff_text(text) != ("new", "UNKNOWN") for text in new_texts)
+
+    if not found(doc):
+        doc.parse(until=found)
+    generation, form_type = sniff_text(doc.full_text)
+    if form_type in SHARED_WITH_OLD_FORMAT:
+        # Old forms have this heading too; read on to look for the footnote
+        doc.parse()
+        return sniff_text(doc.full_text)
+    return generation, form_type
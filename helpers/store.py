@@ -0,0 +1,149 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from helpers.cache import extraction_version, file_hash
+from helpers.output import output_columns
+
+# Columns that downstream queries filter on
+INDEXED_COLUMNS = ["TEAM", "INJURY_DATE", "FORM_TYPE"]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _db_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+class ExtractionStore:
+    """
+    SQLite table of extracted rows, one per source file.
+
+    A row is identified by its source folder (e.g. "men") and FILENAME, and
+    records the content hash and extraction_version() it was extracted from.
+    A run only re-extracts files whose content, extractor version or layout
+    templates changed, and rows of files that disappeared are removed at the
+    end of the run.
+    The spreadsheet and other outputs are exported from this table.
+    """
+
+    TABLE = "injury_data"
+
+    def __init__(self, db_path, version=None):
+        self.db_path = Path(db_path)
+        self.version = extraction_version() if version is None else version
+        self.columns = output_columns(priority=["FILENAME"])
+        self.connection = sqlite3.connect(str(self.db_path))
+        self._create_schema()
+        self._sources = []
+        self._positions = {}
+        self._next_position = 0
+
+    def _create_schema(self):
+        table = _quote(self.TABLE)
+        data_columns = ", ".join(f"{_quote(name)} TEXT" for name in self.columns)
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "source TEXT NOT NULL, position INTEGER, content_hash TEXT NOT NULL, extractor_version TEXT NOT NULL, "
+                f"{data_columns}, PRIMARY KEY (source, \"FILENAME\"))"
+            )
+            # Columns added to constants.columns after the store was created
+            existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+            for name in self.columns:
+                if name not in existing:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(name)} TEXT")
+            for name in INDEXED_COLUMNS:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + name.lower())} ON {table} ({_quote(name)})")
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_position ON {table} (position)")
+
+    def begin_run(self, sources):
+        """Start a run over `sources`; rows not seen again before end_run are removed."""
+        self._sources = list(sources)
+        self._positions = {}
+        placeholders = ", ".join("?" for _ in self._sources)
+        with self.connection:
+            self.connection.execute(f"UPDATE {_quote(self.TABLE)} SET position = NULL WHERE source IN ({placeholders})", self._sources)
+        self._next_position = 0
+
+    def plan(self, source, files, file_names, force=False):
+        """
+        Return (path, content_hash) for the files that need to be extracted.
+
+        Files whose stored row has the same content hash and extractor version
+        keep that row and only get their position in this run's order.
+        """
+        stored = {
+            row[0]: (row[1], row[2])
+            for row in self.connection.execute(
+                f"SELECT \"FILENAME\", content_hash, extractor_version FROM {_quote(self.TABLE)} WHERE source = ?", (source,)
+            )
+        }
+        pending = []
+        with self.connection:
+            for f, file_name in zip(files, file_names):
+                content_hash = file_hash(f)
+                position = self._next_position
+                self._next_position += 1
+                self._positions[(source, file_name)] = position
+                if not force and stored.get(file_name) == (content_hash, self.version):
+                    self.connection.execute(
+                        f"UPDATE {_quote(self.TABLE)} SET position = ? WHERE source = ? AND \"FILENAME\" = ?",
+                        (position, source, file_name),
+                    )
+                else:
+                    pending.append((f, content_hash))
+        return pending
+
+    def upsert(self, source, content_hash, injury_data):
+        """Insert or replace the row of one file; UPDATED_AT is set to now."""
+        injury_data["UPDATED_AT"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        file_name = injury_data["FILENAME"]
+        meta = ["source", "position", "content_hash", "extractor_version"]
+        names = ", ".join(meta + [_quote(name) for name in self.columns])
+        placeholders = ", ".join("?" for _ in range(len(meta) + len(self.columns)))
+        values = [source, self._positions.get((source, file_name)), content_hash, self.version]
+        values += [_db_value(injury_data.get(name, "")) for name in self.columns]
+        with self.connection:
+            self.connection.execute(f"INSERT OR REPLACE INTO {_quote(self.TABLE)} ({names}) VALUES ({placeholders})", values)
+
+    def end_run(self):
+        """Remove the rows of files that were not part of this run; returns how many."""
+        placeholders = ", ".join("?" for _ in self._sources)
+        with self.connection:
+            cursor = self.connection.execute(
+                f"DELETE FROM {_quote(self.TABLE)} WHERE source IN ({placeholders}) AND position IS NULL", self._sources
+            )
+        return cursor.rowcount
+
+    def iter_rows(self, sources=None):
+        """Yield the stored rows as dicts, in the order of the last run."""
+        query = f"SELECT {', '.join(_quote(name) for name in self.columns)} FROM {_quote(self.TABLE)}"
+        params = []
+        if sources is not None:
+            sources = list(sources)
+            query += f" WHERE source IN ({', '.join('?' for _ in sources)})"
+            params = sources
+        query += " ORDER BY position"
+        for values in self.connection.execute(query, params):
+            yield dict(zip(self.columns, values))
+
+    def export(self, writer, sources=None):
+        """Write every stored row to a RowWriter (or RowWriterGroup); returns the number of rows."""
+        count = 0
+        for row in self.iter_rows(sources):
+            writer.write(row)
+            count += 1
+        return count
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,3 +1,16 @@
+# Marker of the old form generation (a footnote at the end of the form)
+OLD_FORMAT_MARKER = "Denotes kept tick box alternatives not covered in the IOC consensus statement 2020 and the FIFA football consensus extension 2023"
+
+# Heading that identifies each form type, in the order they are checked
+FORM_TYPE_MARKERS = [
+    ("Location of impact on head and/or body", "HEAD"),
+    ("Type of illness", "ILLNESS"),
+    ("Injury location", "INJURY"),
+    ("Location of injury (Check all that may apply)", "LOWER_EXTREMITIES"),
+    ("Combination of injuries", "KNEE"),
+]
+
+
 def get_form_type(text: str) -> str:
     """
     Determine the form type based on text content.
@@ -8,15 +21,8 @@ def get_form_type(text: str) -> str:
     Returns:
         Form type: "HEAD", "ILLNESS", "INJURY", "LOWER_EXTREMITIES", "KNEE", or "UNKNOWN"
     """
-    if "Location of impact on head and/or body" in text:
-        return "HEAD"
-    elif "Type of illness" in text:
-        return "ILLNESS"
-    elif "Injury location" in text:
-        return "INJURY"
-    elif "Location of injury (Check all that may apply)" in text:
-        return "LOWER_EXTREMITIES"
-    elif "Combination of injuries" in text:
-        return "KNEE"
+    for marker, form_type in FORM_TYPE_MARKERS:
+        if marker in text:
+            return form_type
     
-    return "UNKNOWN"
\ No newline at end of file
+    return "UNKNOWN"
@@ -2,6 +2,7 @@ import zipfile
 import xml.dom.minidom as minidom
 import sys
 import re
+from bisect import bisect_left, bisect_right
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
@@ -9,6 +10,13 @@ namespaces = {
     'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
     'w14': 'http://schemas.microsoft.com/office/word/2010/wordml'
 }
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_P = _W + 'p'
+_T = _W + 't'
+_FLD_CHAR = _W + 'fldChar'
+_FLD_CHAR_TYPE = _W + 'fldCharType'
+_VAL = _W + 'val'
     
 
 def extract_xml_from_docx(docx_path, output_file=None):
@@ -48,6 +56,113 @@ def extract_xml_from_docx(docx_path, output_file=None):
         print(f"Error: {e}")
         sys.exit(1)
 
+
+class WordDocument:
+    """
+    Paragraph texts and form fields of a .docx, read from a streaming parse.
+
+    document.xml is read from the archive once and kept as bytes (``xml``), so
+    format sniffing can look at the raw XML without opening the file again.
+    It is parsed incrementally. Every paragraph is turned into its text and
+    field spans as soon as it is complete and its content is then dropped,
+    along with finished tables and other blocks, so the full element tree is
+    never held in memory. Format detection and both Word extractors share one
+    WordDocument instead of re-reading the file.
+
+    Args:
+        docx_path: Path to the .docx file
+        until: Optional callable taking the WordDocument; reading stops after the
+            first paragraph for which it returns True (``complete`` is then False)
+        parse: If False, only document.xml is read; call parse() to read paragraphs
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, docx_path, until=None, parse=True):
+        self.path = str(docx_path)
+        self.para_texts = []
+        self.fields = []
+        self.complete = False
+        self._full_text = None
+        with zipfile.ZipFile(docx_path, 'r') as docx_zip:
+            self.xml = docx_zip.read('word/document.xml')
+        self._offset = 0
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._depth = 0
+        self._open_paragraphs = 0
+        self._body = None
+        if parse:
+            self.parse(until)
+
+    @property
+    def paragraph_count(self):
+        return len(self.para_texts)
+
+    @property
+    def full_text(self):
+        if self._full_text is None:
+            self._full_text = "\n".join(self.para_texts)
+        return self._full_text
+
+    def parse(self, until=None):
+        """Read paragraphs from where the previous parse stopped; see `until` above."""
+        while not self.complete:
+            chunk = self.xml[self._offset:self._offset + self.CHUNK_SIZE]
+            self._offset += len(chunk)
+            if chunk:
+                self._parser.feed(chunk)
+            else:
+                self._parser.close()
+            # Events not consumed when `until` stops the loop stay queued in the parser
+            for event, elem in self._parser.read_events():
+                if event == "start":
+                    self._depth += 1
+                    if self._depth == 2:
+                        self._body = elem
+                    elif elem.tag == _P:
+                        self._open_paragraphs += 1
+                    continue
+                self._depth -= 1
+                if elem.tag == _P:
+                    self._open_paragraphs -= 1
+                    if self._open_paragraphs == 0:
+                        # Outermost paragraph complete: index it, then drop its content
+                        self._add_paragraph(elem)
+                        elem.clear()
+                        if self._depth == 2:
+                            self._body.remove(elem)
+                        if until is not None and until(self):
+                            return self
+                        continue
+                if self._depth == 2:
+                    # Finished block of the body (paragraph, table, ...), nothing left to read in it
+                    self._body.remove(elem)
+            if not chunk:
+                self.complete = True
+        return self
+
+    def _add_paragraph(self, para):
+        self._full_text = None
+        # iter() yields the paragraph and any nested ones (e.g. in text boxes)
+        # in the same order as root.findall('.//w:p')
+        for p in para.iter(_P):
+            para_idx = len(self.para_texts)
+            self.para_texts.append(''.join([t.text for t in p.iter(_T) if t.text]))
+            self.fields.extend(paragraph_field_spans(para_idx, p))
+
+
+def open_word(source, parse=True):
+    """
+    Return `source` if it is already a WordDocument, otherwise read the .docx at that path.
+
+    With parse=True the document is read to the end, also when `source` is a
+    WordDocument whose parse was stopped early.
+    """
+    if isinstance(source, WordDocument):
+        return source.parse() if parse else source
+    return WordDocument(source, parse=parse)
+
+
 # Small helpers to DRY up repeated patterns
 def get_text_display_from_runs(runs, start_idx):
     """Return displayed text for a FORMTEXT field that begins at runs[start_idx]."""
@@ -87,7 +202,214 @@ def find_section_bounds(para_texts, start_marker, end_marker=None, num_paragraph
         end_idx_local = start_idx_local + num_paragraphs + 1
     return start_idx_local, end_idx_local
 
-def extract_form_fields(root, paragraphs, namespaces):
+
+class SectionIndex:
+    """
+    Section lookups for one document, answering the same queries as find_section_bounds.
+
+    The lowercased paragraphs are joined once, and every marker is searched in
+    that text only the first time it is used. Checkbox entries and text fields
+    are kept sorted by paragraph, so the entries of a section are found with
+    bisect instead of filtering the whole list on every call.
+    """
+
+    _SEPARATOR = "\x00"
+
+    def __init__(self, para_texts, checkbox_entries=(), fields=()):
+        lowered = [(text or '').lower() for text in para_texts]
+        self._text = self._SEPARATOR.join(lowered)
+        # Offset in self._text at which each paragraph starts
+        self._offsets = []
+        offset = 0
+        for text in lowered:
+            self._offsets.append(offset)
+            offset += len(text) + len(self._SEPARATOR)
+        self._occurrences = {}
+        self._bounds = {}
+
+        self._checkbox_entries = sorted(checkbox_entries, key=lambda entry: entry['para_idx'])
+        self._checkbox_paras = [entry['para_idx'] for entry in self._checkbox_entries]
+        self._text_fields = sorted((span for span in fields if span['is_text']), key=lambda span: span['para_idx'])
+        self._text_field_paras = [span['para_idx'] for span in self._text_fields]
+
+    def occurrences(self, marker):
+        """Sorted indexes of the paragraphs whose lowercased text contains `marker`."""
+        marker_lower = marker.lower()
+        found = self._occurrences.get(marker_lower)
+        if found is None:
+            found = []
+            pos = self._text.find(marker_lower) if marker_lower else -1
+            while pos != -1:
+                para_idx = bisect_right(self._offsets, pos) - 1
+                found.append(para_idx)
+                # Continue in the next paragraph, one hit per paragraph is enough
+                if para_idx + 1 >= len(self._offsets):
+                    break
+                pos = self._text.find(marker_lower, self._offsets[para_idx + 1])
+            self._occurrences[marker_lower] = found
+        return found
+
+    def bounds(self, start_marker, end_marker=None, num_paragraphs=None):
+        """Same result as find_section_bounds(para_texts, start_marker, end_marker, num_paragraphs)."""
+        if num_paragraphs is None and end_marker is None:
+            raise ValueError("Either end_marker or num_paragraphs must be provided")
+        key = (start_marker, end_marker, num_paragraphs)
+        if key not in self._bounds:
+            start_idx_local = None
+            end_idx_local = None
+            if start_marker:
+                starts = self.occurrences(start_marker)
+                if starts:
+                    start_idx_local = starts[0]
+                    if end_marker:
+                        ends = self.occurrences(end_marker)
+                        i = bisect_right(ends, start_idx_local)
+                        if i < len(ends):
+                            end_idx_local = ends[i]
+            if num_paragraphs is not None and start_idx_local is not None:
+                end_idx_local = start_idx_local + num_paragraphs + 1
+            self._bounds[key] = (start_idx_local, end_idx_local)
+        return self._bounds[key]
+
+    def checkboxes_between(self, start_idx, end_idx=None):
+        """Checkbox entries with start_idx < para_idx < end_idx (no upper limit if end_idx is None)."""
+        lo = bisect_right(self._checkbox_paras, start_idx)
+        hi = len(self._checkbox_paras) if end_idx is None else bisect_left(self._checkbox_paras, end_idx)
+        return self._checkbox_entries[lo:hi]
+
+    def text_fields_between(self, start_idx, end_idx=None):
+        """Text field spans with start_idx <= para_idx < end_idx (no upper limit if end_idx is None)."""
+        lo = bisect_left(self._text_field_paras, start_idx)
+        hi = len(self._text_field_paras) if end_idx is None else bisect_left(self._text_field_paras, end_idx)
+        return self._text_fields[lo:hi]
+
+
+def _field_from_begin(fld_begin):
+    """Return (name, is_text, is_checkbox, checked) for a begin fldChar, or None if it has no ffData."""
+    ffdata = fld_begin.find('.//w:ffData', namespaces)
+    if ffdata is None:
+        return None
+    name_elem = ffdata.find('.//w:name', namespaces)
+    field_name = name_elem.get(_VAL) if name_elem is not None else None
+    checkbox = ffdata.find('.//w:checkBox', namespaces)
+    is_checked = False
+    if checkbox is not None:
+        checked_elem = checkbox.find('.//w:checked', namespaces)
+        # Consider both <w:checked/> and <w:checked w:val="1"/> as checked
+        if checked_elem is not None:
+            checked_val = checked_elem.get(_VAL)
+            is_checked = (checked_val is None) or (checked_val == '1')
+    is_text = ffdata.find('.//w:textInput', namespaces) is not None
+    return field_name, is_text, checkbox is not None, is_checked
+
+
+def build_field_spans(paragraphs):
+    """
+    Index every form field (FORMTEXT / FORMCHECKBOX) of the document in one pass.
+
+    Each run is visited once to record its first text and its begin/separate/end
+    field characters. Display text, checkbox labels and the text field following
+    a checkbox are then resolved from those per-paragraph indexes with bisect,
+    instead of rescanning the remaining runs for every field.
+
+    Returns:
+        list of dicts in document order with keys para_idx, name, is_text,
+        is_checkbox, checked, display, label and following_text
+    """
+    spans = []
+    for para_idx, para in enumerate(paragraphs):
+        spans.extend(paragraph_field_spans(para_idx, para))
+    return spans
+
+
+def paragraph_field_spans(para_idx, para):
+    """Field spans of a single paragraph, see build_field_spans."""
+    spans = []
+    runs = para.findall('.//w:r', namespaces)
+    if not runs:
+        return spans
+    texts = []
+    begins = []
+    separates = []
+    ends = []
+    fields = {}
+    for i, run in enumerate(runs):
+        # Same element run.find('.//w:t') returns: the first one in document order
+        t_el = next(run.iter(_T), None)
+        texts.append(t_el.text if t_el is not None and t_el.text else "")
+        fld_begin = None
+        for fld_char in run.iter(_FLD_CHAR):
+            fld_type = fld_char.get(_FLD_CHAR_TYPE)
+            if fld_type == 'begin':
+                if fld_begin is None:
+                    fld_begin = fld_char
+            elif fld_type == 'separate':
+                if not separates or separates[-1] != i:
+                    separates.append(i)
+            elif fld_type == 'end':
+                if not ends or ends[-1] != i:
+                    ends.append(i)
+        if fld_begin is not None:
+            begins.append(i)
+            field = _field_from_begin(fld_begin)
+            if field is not None:
+                fields[i] = field
+
+    if not fields:
+        return spans
+
+    def display(start_idx):
+        # Displayed value: runs after the first separate, up to and including the end
+        s = bisect_right(separates, start_idx)
+        if s == len(separates):
+            return ""
+        sep = separates[s]
+        e = bisect_right(ends, sep)
+        stop = ends[e] + 1 if e < len(ends) else len(runs)
+        return ''.join(texts[sep + 1:stop]).strip()
+
+    for i, (field_name, is_text, is_checkbox, is_checked) in fields.items():
+        b = bisect_right(begins, i)
+        next_begin = begins[b] if b < len(begins) else None
+        span = {
+            'para_idx': para_idx,
+            'name': field_name,
+            'is_text': is_text,
+            'is_checkbox': is_checkbox,
+            'checked': is_checked,
+            'display': display(i) if is_text else "",
+            'label': "",
+            'following_text': "",
+        }
+        if is_checkbox:
+            # The label is the text up to the next field
+            span['label'] = ''.join(texts[i + 1:next_begin]).strip()
+            # Only a text field directly after the checkbox counts as its following text
+            if next_begin is not None and next_begin in fields and fields[next_begin][1]:
+                span['following_text'] = display(next_begin)
+        spans.append(span)
+    return spans
+
+
+def collect_form_fields(fields):
+    """
+    Split field spans into named text field values and checkbox entries.
+
+    Returns:
+        tuple: (text_fields dict, checkbox_entries list)
+    """
+    # Map of all named text input fields and their displayed values
+    text_fields = {}
+    checkbox_entries = []
+    for span in fields:
+        if span['is_text'] and span['name']:
+            text_fields[span['name']] = span['display']
+        if span['is_checkbox'] and (span['name'] or span['label']):
+            checkbox_entries.append({'checked': span['checked'], 'label': span['label'], 'para_idx': span['para_idx'], 'following_text': span['following_text']})
+    return text_fields, checkbox_entries
+
+
+def extract_form_fields(root, paragraphs, namespaces, fields=None):
     """
     Extract all form fields (text inputs and checkboxes) from Word document XML.
     
@@ -95,93 +417,16 @@ def extract_form_fields(root, paragraphs, namespaces):
         root: XML root element
         paragraphs: List of paragraph elements
         namespaces: XML namespace dictionary
+        fields: Optional field spans from build_field_spans, built here if not given
         
     Returns:
         tuple: (text_fields dict, checkbox_entries list, para_texts list)
     """
-    from helpers.word import get_text_display_from_runs
-    
-    # Build a map of all text input fields and their displayed values
-    text_fields = {}
-    for para in paragraphs:
-        elements = list(para.findall('.//w:r', namespaces))
-        
-        for i, run in enumerate(elements):
-            fld_begin = run.find('.//w:fldChar[@w:fldCharType="begin"]', namespaces)
-            if fld_begin is not None:
-                ffdata = fld_begin.find('.//w:ffData', namespaces)
-                if ffdata is not None:
-                    name_elem = ffdata.find('.//w:name', namespaces)
-                    field_name = name_elem.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val') if name_elem is not None else None
-                    
-                    # Check if it's a text input (not checkbox)
-                    text_input = ffdata.find('.//w:textInput', namespaces)
-                    if text_input is not None and field_name:
-                        text_fields[field_name] = get_text_display_from_runs(elements, i)
-    
-    para_texts = []
-    checkboxes = {}
-    checkbox_entries = []
-    
-    for para_idx, para in enumerate(root.findall('.//w:p', namespaces)):
-        # Aggregate full paragraph text (runs may split words)
-        para_text = ''.join([t.text for t in para.findall('.//w:t', namespaces) if t.text])
-        para_texts.append(para_text)
-        elements = list(para.findall('.//w:r', namespaces))
-        
-        for i, run in enumerate(elements):
-            fld_begin = run.find('.//w:fldChar[@w:fldCharType="begin"]', namespaces)
-            if fld_begin is not None:
-                ffdata = fld_begin.find('.//w:ffData', namespaces)
-                if ffdata is not None:
-                    checkbox = ffdata.find('.//w:checkBox', namespaces)
-                    if checkbox is not None:
-                        name_elem = ffdata.find('.//w:name', namespaces)
-                        checked_elem = checkbox.find('.//w:checked', namespaces)
-                        
-                        field_name = name_elem.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val') if name_elem is not None else None
-                        # Consider both <w:checked/> and <w:checked w:val="1"/> as checked
-                        if checked_elem is not None:
-                            checked_val = checked_elem.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val')
-                            is_checked = (checked_val is None) or (checked_val == '1')
-                        else:
-                            is_checked = False
-                        
-                        # Get the label text that follows the checkbox
-                        label = ""
-                        for j in range(i + 1, len(elements)):
-                            next_run = elements[j]
-                            if next_run.find('.//w:fldChar[@w:fldCharType="begin"]', namespaces) is not None:
-                                break
-                            text_elem = next_run.find('.//w:t', namespaces)
-                            if text_elem is not None and text_elem.text:
-                                label += text_elem.text
-                        label = (label or "").strip()
-                        
-                        # If the label is suspiciously short, append next paragraph text
-                        if (not label) or len(label) <= 2:
-                            if para_idx + 1 < len(para_texts):
-                                next_para_text = (para_texts[para_idx + 1] or "").strip()
-                                if next_para_text:
-                                    prefix = next_para_text[:30]
-                                    label = (label + prefix).strip()
-                        
-                        # Capture following text field content
-                        following_text = ""
-                        for j in range(i + 1, len(elements)):
-                            next_run = elements[j]
-                            fld_begin_ahead = next_run.find('.//w:fldChar[@w:fldCharType="begin"]', namespaces)
-                            if fld_begin_ahead is not None:
-                                ffdata_ahead = fld_begin_ahead.find('.//w:ffData', namespaces)
-                                if ffdata_ahead is not None and ffdata_ahead.find('.//w:textInput', namespaces) is not None:
-                                    following_text = get_text_display_from_runs(elements, j)
-                                    break
-                                break
-                        
-                        if field_name or label:
-                            key = field_name if field_name else label
-                            entry = {'checked': is_checked, 'label': label.strip(), 'para_idx': para_idx, 'following_text': following_text}
-                            checkboxes[key] = {'checked': is_checked, 'label': label.strip()}
-                            checkbox_entries.append(entry)
-    
-    return text_fields, checkbox_entries, para_texts
\ No newline at end of file
+    if fields is None:
+        fields = build_field_spans(paragraphs)
+    text_fields, checkbox_entries = collect_form_fields(fields)
+
+    # Aggregate full paragraph text (runs may split words)
+    para_texts = [''.join([t.text for t in para.findall('.//w:t', namespaces) if t.text]) for para in paragraphs]
+
+    return text_fields, checkbox_entries, para_texts
@@ -0,0 +1,48 @@
+import fitz  # pip install pymupdf
+
+from helpers.pdf import detect_checkboxes_vector, get_checkbox_info
+
+BOX_SIZE = 10
+TICKED = {1, 4, 9, 12, 17, 23, 28, 31, 36, 42, 49}
+
+
+def make_form():
+    """A born-digital page with 50 drawn 10 pt boxes, 11 of them ticked with a typed 9 pt "X"."""
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    for i in range(50):
+        x = 80 + (i % 5) * 90
+        y = 120 + (i // 5) * 60
+        page.draw_rect(fitz.Rect(x, y, x + BOX_SIZE, y + BOX_SIZE), color=(0, 0, 0), width=0.8)
+        page.insert_text((x + BOX_SIZE + 4, y + 8), f"Option {i + 1}", fontsize=9)  # label next to the box, outside it
+        if i in TICKED:
+            page.insert_text((x + 2, y + 8.5), "X", fontsize=9)
+    return fitz.open("pdf", doc.tobytes())
+
+
+def test_typed_ticks_are_checked():
+    page = make_form()[0]
+    boxes = sorted(detect_checkboxes_vector(page), key=lambda b: (b["bbox"][1], b["bbox"][0]))
+    assert len(boxes) == 50
+    assert {i for i, box in enumerate(boxes) if box["checked"]} == TICKED
+
+
+def test_auto_backend_matches_raster(tmp_path):
+    path = tmp_path / "form.pdf"
+    make_form().save(path)
+    auto = get_checkbox_info(path, backend="auto", expected_count=50).to_dict()
+    raster = get_checkbox_info(path, backend="raster").to_dict()
+    assert {number for number, checked in auto.items() if checked} == {str(i + 1) for i in TICKED}
+    assert auto == raster
+
+
+def test_stray_square_on_scanned_page_falls_back_to_raster(tmp_path):
+    scan = fitz.open()
+    page = scan.new_page(width=595, height=842)
+    page.insert_image(page.rect, pixmap=make_form()[0].get_pixmap(dpi=200))
+    page.draw_rect(fitz.Rect(500, 780, 510, 790), color=(0, 0, 0), width=0.8)  # e.g. a stamp
+    path = tmp_path / "scan.pdf"
+    scan.save(path)
+    state = get_checkbox_info(path, backend="auto", expected_count=51)
+    assert len(state) == 51
+    assert {number for number, checked in state.to_dict().items() if checked} == {str(i + 1) for i in TICKED}